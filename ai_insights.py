@@ -0,0 +1,258 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from metrics import REGISTRY
+
+try:
+    import google.generativeai as genai
+except ImportError:  # stub models (tests, benchmarks) don't need the SDK
+    genai = None
+
+AI_MODEL_NAME = 'gemini-1.5-flash'
+
+# --- INSIGHT CACHE ---
+INSIGHT_CACHE_SIZE = 256
+INSIGHT_CACHE_TTL = 300  # seconds before a cached assessment is regenerated anyway
+# Bin widths for the cache signature: readings inside one bin get the same assessment
+SIGNATURE_BINS = {'heart_rate': 5, 'temperature': 0.5, 'systolic': 10, 'diastolic': 5, 'spo2': 1}
+
+LLM_SECONDS = REGISTRY.histogram("vitalguard_llm_seconds", "Gemini generate_content latency")
+# outcome: llm (model answered), cached (cache hit), fallback (rule-based text after an error)
+INSIGHT_RESULTS = REGISTRY.counter("vitalguard_insights", "Insights produced by outcome", ["outcome"])
+
+@lru_cache(maxsize=1)
+def get_model():
+    """One shared GenerativeModel instead of a new one per call"""
+    return genai.GenerativeModel(AI_MODEL_NAME)
+
+TREND_LABELS = {
+    'HR': {1: "increasing", -1: "decreasing", 0: "stable"},
+    'Temp': {1: "rising", -1: "falling", 0: "stable"},
+}
+
+def get_vital_trends(stats):
+    """(hr_trend, temp_trend) from a patient's VitalsStats slopes, or None until its window is full"""
+    if not stats['HR'].full():
+        return None
+    return tuple(TREND_LABELS[name][stats.trend(name)] for name in ('HR', 'Temp'))
+
+def insight_signature(vitals, trends, alert_context):
+    """Quantized clinical state used as the cache key"""
+    systolic, diastolic = (float(v) for v in vitals['blood_pressure'].split('/'))
+    readings = {
+        'heart_rate': float(vitals['heart_rate']),
+        'temperature': float(vitals['temperature']),
+        'systolic': systolic,
+        'diastolic': diastolic,
+        'spo2': float(vitals.get('spo2', 98)),
+    }
+    bins = tuple(int(round(readings[name] / width)) for name, width in SIGNATURE_BINS.items())
+    # Alert context entries look like "High HR: 104.2"; the label is the clinical state
+    alert_labels = frozenset(a.split(':')[0] for a in alert_context[-3:])
+    return bins + (vitals['risk_score'], trends, alert_labels)
+
+class InsightCache:
+    """LRU cache with a TTL for generated insight text, with hit/miss counters"""
+
+    def __init__(self, max_size=INSIGHT_CACHE_SIZE, ttl=INSIGHT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, text):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), text)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+def get_live_ai_insight(vitals, trends, alert_context, model=None, cache=None):
+    """Generate sophisticated AI-powered clinical insights with context.
+
+    trends is the (hr_trend, temp_trend) pair from get_vital_trends, or None.
+    """
+    try:
+        key = None
+        if cache is not None:
+            key = insight_signature(vitals, trends, alert_context)
+            cached = cache.get(key)
+            if cached is not None:
+                INSIGHT_RESULTS.inc(outcome="cached")
+                return cached
+        
+        if model is None:
+            model = get_model()
+        
+        trend_info = ""
+        if trends is not None:
+            hr_trend, temp_trend = trends
+            trend_info = f"\nRecent trends: HR is {hr_trend}, Temperature is {temp_trend}"
+        
+        # Build context-aware prompt
+        prompt = f"""You are an expert ICU monitoring AI analyzing real-time patient vitals. Provide a clinical assessment.
+
+CURRENT VITALS:
+- Heart Rate: {vitals['heart_rate']} BPM (Normal: 60-100)
+- Temperature: {vitals['temperature']} °F (Normal: 97-100)
+- Blood Pressure: {vitals['blood_pressure']} mmHg (Normal: 90-120/60-80)
+- SpO2: {vitals.get('spo2', 98)}% (Normal: >95%)
+- Computed Risk Score: {vitals['risk_score']}/10
+{trend_info}
+
+RECENT ALERTS: {', '.join(alert_context[-3:]) if alert_context else 'None'}
+
+TASK:
+1. Identify specific clinical concerns (be explicit about what's abnormal)
+2. Explain the clinical significance (why it matters)
+3. Provide ONE specific, actionable nursing intervention
+4. Rate urgency: ROUTINE / MONITOR CLOSELY / URGENT / CRITICAL
+
+Format: [URGENCY] Clinical finding | Significance | Action
+Keep response to 2-3 sentences maximum."""
+        
+        with LLM_SECONDS.time():
+            response = model.generate_content(prompt)
+        text = response.text.strip()
+        INSIGHT_RESULTS.inc(outcome="llm")
+        # Only real model output is cached; fallbacks are recomputed next time
+        if key is not None:
+            cache.put(key, text)
+        return text
+    except Exception as e:
+        INSIGHT_RESULTS.inc(outcome="fallback")
+        # Fallback with actual analysis
+        issues = []
+        if vitals['heart_rate'] > 100:
+            issues.append(f"Tachycardia ({vitals['heart_rate']} BPM)")
+        elif vitals['heart_rate'] < 60:
+            issues.append(f"Bradycardia ({vitals['heart_rate']} BPM)")
+        
+        if vitals['temperature'] > 100.4:
+            issues.append(f"Fever ({vitals['temperature']}°F)")
+        elif vitals['temperature'] < 97:
+            issues.append(f"Hypothermia ({vitals['temperature']}°F)")
+        
+        bp_parts = vitals['blood_pressure'].split('/')
+        if len(bp_parts) == 2:
+            sys, dias = int(bp_parts[0]), int(bp_parts[1])
+            if sys > 140 or dias > 90:
+                issues.append(f"Hypertension ({vitals['blood_pressure']})")
+            elif sys < 90 or dias < 60:
+                issues.append(f"Hypotension ({vitals['blood_pressure']})")
+        
+        if issues:
+            return f"[MONITOR CLOSELY] Detected: {', '.join(issues)}. Risk score {vitals['risk_score']}/10. Recommend: Continue monitoring and notify physician if trends worsen."
+        else:
+            return f"[ROUTINE] Vitals within acceptable parameters. Risk score {vitals['risk_score']}/10. Continue routine monitoring."
+
+# --- BACKGROUND INSIGHT WORKER ---
+class InsightWorker:
+    """Generates insights off the render loop with at most one LLM request in flight per patient.
+
+    A trigger that arrives while that patient's request is running is parked;
+    further triggers are merged into it (newest vitals, union of alert context)
+    and it runs as soon as the current request finishes. Finished insights are
+    picked up with collect(), so only the caller's thread touches session state.
+    """
+
+    def __init__(self, model=None, max_workers=2, cache=None):
+        self.model = model
+        self.cache = cache if cache is not None else InsightCache()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="insight")
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._pending = {}
+        self._results = {}
+        self._discarded = set()  # patients dropped while a request was running; its result is thrown away
+        self.submitted = 0
+        self.coalesced = 0
+
+    def submit(self, patient_id, vitals, trends, alert_context, time_str):
+        """Queue an insight request; returns False if it was merged into a pending one"""
+        request = {
+            'vitals': vitals,
+            'trends': trends,
+            'alert_context': list(alert_context),
+            'time': time_str,
+        }
+        with self._lock:
+            self.submitted += 1
+            if patient_id in self._in_flight:
+                parked = self._pending.get(patient_id)
+                if parked is not None:
+                    self.coalesced += 1
+                    merged = parked['alert_context'] + [a for a in request['alert_context'] if a not in parked['alert_context']]
+                    request['alert_context'] = merged
+                self._pending[patient_id] = request
+                return parked is None
+            self._in_flight.add(patient_id)
+        self._executor.submit(self._run, patient_id, request)
+        return True
+
+    def _run(self, patient_id, request):
+        while request is not None:
+            text = get_live_ai_insight(
+                request['vitals'], request['trends'], request['alert_context'],
+                model=self.model, cache=self.cache
+            )
+            insight = {
+                'time': request['time'],
+                'text': text,
+                'risk_score': request['vitals']['risk_score'],
+            }
+            with self._lock:
+                if patient_id in self._discarded:
+                    self._discarded.discard(patient_id)
+                else:
+                    self._results.setdefault(patient_id, []).append(insight)
+                request = self._pending.pop(patient_id, None)
+                if request is None:
+                    self._in_flight.discard(patient_id)
+
+    def busy(self, patient_id):
+        with self._lock:
+            return patient_id in self._in_flight
+
+    def collect(self, patient_id):
+        """Insights finished since the last call, oldest first"""
+        with self._lock:
+            return self._results.pop(patient_id, [])
+
+    def discard(self, patient_id):
+        """Forget a patient's finished, parked and running requests"""
+        with self._lock:
+            self._results.pop(patient_id, None)
+            self._pending.pop(patient_id, None)
+            if patient_id in self._in_flight:
+                self._discarded.add(patient_id)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
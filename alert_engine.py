@@ -0,0 +1,195 @@
+import heapq
+from collections import OrderedDict, namedtuple
+from enum import IntEnum
+from itertools import islice
+
+from risk_engine import NORMAL
+
+# --- ALERT ENGINE (typed records with open/ongoing/resolved state) ---
+# A condition (vital + direction) raises one record while it lasts instead of
+# a new line every sample. It resolves after CLEAR_SAMPLES consecutive samples
+# without it (hysteresis), and if it comes back within REOPEN_SECONDS the old
+# record is reopened. The rate limit only holds back repeats below CRITICAL: a
+# reopened critical record, or one climbing back to CRITICAL after easing,
+# notifies again and moves back to the top.
+ALERT_CAPACITY = 50  # records kept per severity
+CLEAR_SAMPLES = 3
+REOPEN_SECONDS = 120
+
+OPEN, ONGOING, RESOLVED = "open", "ongoing", "resolved"
+
+class Severity(IntEnum):
+    INFO = 0
+    WARNING = 1
+    CRITICAL = 2
+
+    @property
+    def label(self):
+        """'critical' / 'warning' / 'info', as used by the CSS classes and counters"""
+        return self.name.lower()
+
+SEVERITY_ICONS = {Severity.CRITICAL: "🚨", Severity.WARNING: "⚠️", Severity.INFO: "ℹ️"}
+
+# seq orders records by their latest notification (open, escalation); records are
+# immutable and replaced on every update, so snapshots can share them across threads
+AlertRecord = namedtuple("AlertRecord", [
+    "id", "seq", "key", "vital", "severity", "peak", "title", "value", "action", "context",
+    "onset", "last_seen", "resolved_at", "state", "count",
+])
+AlertSnapshot = namedtuple("AlertSnapshot", ["recent", "by_severity", "counts", "active"])
+
+def alert_key(alert):
+    """Condition identity: escalation (Tachycardia -> Severe Tachycardia) keeps the key, a flip to Bradycardia does not"""
+    direction = "low" if alert.band is not None and alert.band < NORMAL else "high"
+    return alert.vital, direction
+
+def format_alert(record):
+    """One-line text for a record, in the dashboard's original alert style"""
+    text = f"[{record.onset.strftime('%H:%M:%S')}] {SEVERITY_ICONS[record.severity]} {record.severity.name}: {record.title}"
+    if record.value:
+        text += f" - {record.value}"
+    if record.action:
+        text += f" | {record.action}"
+    if record.state == ONGOING:
+        text += f" · ongoing ({record.count} readings)"
+    elif record.state == RESOLVED:
+        text += f" · resolved {record.resolved_at.strftime('%H:%M:%S')}"
+    return text
+
+class AlertEngine:
+    """Turns each sample's alert candidates (risk_engine.Alert) into deduplicated records.
+
+    Records are filed under their peak severity in insertion-ordered indexes,
+    so "newest k critical alerts" is k steps and "newest k of any severity" is
+    a k-step merge of three indexes.
+    """
+
+    def __init__(self, capacity=ALERT_CAPACITY, clear_samples=CLEAR_SAMPLES, reopen_seconds=REOPEN_SECONDS):
+        self.capacity = capacity
+        self.clear_samples = clear_samples
+        self.reopen_seconds = reopen_seconds
+        self.clear()
+
+    def clear(self):
+        self._by_severity = {severity: OrderedDict() for severity in Severity}
+        self._active = {}    # key -> record id
+        self._clearing = {}  # key -> consecutive samples without the condition
+        self._resolved = {}  # key -> id of its last resolved record, for reopening
+        self._records = {}   # id -> record
+        self._next_id = 0
+        self._next_seq = 0
+        self.counts = {severity.label: 0 for severity in Severity}  # notifications per severity
+
+    def __len__(self):
+        return len(self._records)
+
+    def update(self, alerts, now):
+        """Apply one sample's candidates; returns the records that notify (opened, escalated or critical again)"""
+        notified = []
+        seen = set()
+        for alert in alerts:
+            key = alert_key(alert)
+            if key in seen:
+                continue
+            seen.add(key)
+            self._clearing.pop(key, None)
+            severity = Severity[alert.severity.upper()]
+            record = self._records.get(self._active.get(key))
+            reopened = False
+            if record is None:
+                record = self._reopen(key, now)
+                reopened = record is not None
+            if record is None:
+                record = self._open(key, alert, severity, now)
+                notified.append(record)
+                continue
+            critical_again = severity == Severity.CRITICAL and (reopened or record.severity < severity)
+            escalated = severity > record.peak or critical_again
+            updated = record._replace(
+                severity=severity, peak=max(record.peak, severity), title=alert.title, value=alert.value,
+                action=alert.action, context=alert.context, last_seen=now, state=ONGOING,
+                count=record.count + 1, resolved_at=None
+            )
+            if escalated:
+                updated = updated._replace(seq=self._take_seq())
+                self.counts[severity.label] += 1
+                notified.append(updated)
+            self._store(updated, previous=record)
+            self._active[key] = updated.id
+
+        for key, record_id in list(self._active.items()):
+            if key in seen:
+                continue
+            missed = self._clearing.get(key, 0) + 1
+            if missed < self.clear_samples:
+                self._clearing[key] = missed
+                continue
+            del self._active[key]
+            self._clearing.pop(key, None)
+            record = self._records[record_id]
+            self._store(record._replace(state=RESOLVED, resolved_at=now), previous=record)
+            self._resolved[key] = record_id
+        return notified
+
+    def _take_seq(self):
+        self._next_seq += 1
+        return self._next_seq
+
+    def _open(self, key, alert, severity, now):
+        self._next_id += 1
+        record = AlertRecord(
+            id=self._next_id, seq=self._take_seq(), key=key, vital=alert.vital,
+            severity=severity, peak=severity, title=alert.title, value=alert.value,
+            action=alert.action, context=alert.context, onset=now, last_seen=now,
+            resolved_at=None, state=OPEN, count=1,
+        )
+        self.counts[severity.label] += 1
+        self._store(record)
+        self._active[key] = record.id
+        return record
+
+    def _reopen(self, key, now):
+        """The condition's recently resolved record, if it came back within reopen_seconds"""
+        record = self._records.get(self._resolved.pop(key, None))
+        if record is None or (now - record.resolved_at).total_seconds() >= self.reopen_seconds:
+            return None
+        return record
+
+    def _store(self, record, previous=None):
+        index = self._by_severity[record.peak]
+        if previous is not None and previous.peak != record.peak:
+            del self._by_severity[previous.peak][record.id]
+        index[record.id] = record
+        if previous is None or record.seq != previous.seq:
+            index.move_to_end(record.id)  # newest notification last
+        self._records[record.id] = record
+        if len(index) > self.capacity:
+            self._evict(index)
+
+    def _evict(self, index):
+        active = set(self._active.values())
+        for record_id in index:
+            if record_id not in active:
+                del index[record_id]
+                del self._records[record_id]
+                return
+
+    def recent(self, severity=None, limit=10):
+        """Newest-first records, optionally of one (peak) severity"""
+        if severity is not None:
+            return list(islice(reversed(self._by_severity[severity].values()), limit))
+        merged = heapq.merge(*(reversed(index.values()) for index in self._by_severity.values()),
+                             key=lambda record: record.seq, reverse=True)
+        return list(islice(merged, limit))
+
+    def active(self):
+        return [self._records[record_id] for record_id in self._active.values()]
+
+    def snapshot(self, limit=10):
+        """Immutable newest-first views for rendering, `limit` records each"""
+        return AlertSnapshot(
+            recent=tuple(self.recent(limit=limit)),
+            by_severity={severity: tuple(self.recent(severity, limit)) for severity in Severity},
+            counts=dict(self.counts),
+            active=len(self._active),
+        )
@@ -0,0 +1,221 @@
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from http_client import PooledClient
+
+# --- INGEST / READ LOAD BENCHMARK ---
+# Drives /update writers (patients x Hz) and dashboard-style readers
+# (dashboards x refresh) against the backend, then reports throughput,
+# latency percentiles and memory growth as JSON for cross-commit comparison.
+DEFAULT_PATIENTS = 50
+DEFAULT_HZ = 1.0  # samples per patient per second; 0 = as fast as possible
+DEFAULT_WRITER_THREADS = 8
+DEFAULT_DASHBOARDS = 10
+DEFAULT_REFRESH = 2.0  # seconds between one dashboard's reads
+DEFAULT_DURATION = 30
+DEFAULT_OUTPUT = "bench_ingest_results.json"
+HISTORY_LIMIT = 200  # rows a reader pulls from /history, like the trend charts
+PERCENTILES = (50, 95, 99)
+
+def rss_mb():
+    """Resident set size of this process (Linux), or None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_local_server(archive_dir):
+    """Run jshttps in this process on a free localhost port; returns (base_url, server, module)"""
+    import uvicorn
+    import jshttps
+
+    # Keep benchmark samples out of the real archive (jshttps opens it at startup)
+    jshttps.ARCHIVE_ROOT = archive_dir
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(jshttps.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server, jshttps
+
+class OpStats:
+    """Latencies and errors for one operation, shared by its threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.errors = {}
+
+    def record(self, seconds, error=None):
+        with self._lock:
+            if error is None:
+                self.latencies.append(seconds)
+            else:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+    def summary(self, elapsed):
+        ms = np.array(self.latencies) * 1000
+        result = {
+            "count": len(ms),
+            "errors": dict(self.errors),
+            "throughput_per_s": round(len(ms) / elapsed, 1) if elapsed > 0 else None,
+        }
+        for p in PERCENTILES:
+            result[f"p{p}_ms"] = round(float(np.percentile(ms, p)), 2) if len(ms) else None
+        result["max_ms"] = round(float(ms.max()), 2) if len(ms) else None
+        return result
+
+def timed(stats, call):
+    start = time.perf_counter()
+    try:
+        response = call()
+        error = None if response.status_code < 400 else f"HTTP {response.status_code}"
+    except Exception as e:
+        error = type(e).__name__
+    stats.record(time.perf_counter() - start, error)
+
+def sample(patient_id, ts):
+    return {
+        "patient_id": patient_id,
+        "timestamp": ts,
+        "heart_rate": round(random.gauss(80, 10), 1),
+        "body_temperature": round(random.gauss(98.6, 0.5), 1),
+        "systolic_bp": round(random.gauss(120, 10)),
+        "diastolic_bp": round(random.gauss(80, 8)),
+        "spo2": random.randint(92, 100),
+    }
+
+def writer(client, base_url, patient_ids, hz, stop, stats):
+    """Round-robin over this thread's patients at hz per patient (open loop, catches up when late)"""
+    interval = 1 / (hz * len(patient_ids)) if hz > 0 else 0
+    due = time.monotonic()
+    i = 0
+    while not stop.is_set():
+        if interval:
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            due += interval
+        patient_id = patient_ids[i % len(patient_ids)]
+        i += 1
+        payload = sample(patient_id, time.time())
+        timed(stats, lambda: client.post(f"{base_url}/update", json=payload))
+
+def reader(client, base_url, patient_ids, refresh, stop, latest_stats, history_stats):
+    """One dashboard: all-beds latest plus one bed's trend history per refresh"""
+    # Spread dashboards over the refresh period instead of firing in lockstep
+    stop.wait(random.uniform(0, refresh))
+    while not stop.is_set():
+        timed(latest_stats, lambda: client.get(f"{base_url}/latest", params={"all": "true"}))
+        patient_id = random.choice(patient_ids)
+        timed(history_stats, lambda: client.get(f"{base_url}/history/{patient_id}", params={"limit": HISTORY_LIMIT}))
+        stop.wait(refresh)
+
+def run_benchmark(base_url, patients, hz, writer_threads, dashboards, refresh, duration):
+    patient_ids = [str(p) for p in range(patients)]
+    writer_threads = max(1, min(writer_threads, patients))
+    client = PooledClient(pool_size=writer_threads + dashboards, retries=0)
+    ops = {"update": OpStats(), "latest_all": OpStats(), "history": OpStats()}
+    stop = threading.Event()
+
+    # Seed every bed so readers never see 404s
+    for patient_id in patient_ids:
+        client.post(f"{base_url}/update", json=sample(patient_id, time.time()))
+
+    threads = [
+        threading.Thread(target=writer, args=(client, base_url, patient_ids[w::writer_threads], hz, stop, ops["update"]))
+        for w in range(writer_threads)
+    ] + [
+        threading.Thread(target=reader, args=(client, base_url, patient_ids, refresh, stop, ops["latest_all"], ops["history"]))
+        for _ in range(dashboards)
+    ]
+    rss_start = rss_mb()
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    stop.wait(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.monotonic() - start
+    rss_end = rss_mb()
+    client.close()
+
+    return {
+        "target_writes_per_s": patients * hz if hz > 0 else None,
+        "elapsed_s": round(elapsed, 2),
+        "ops": {name: stats.summary(elapsed) for name, stats in ops.items()},
+        "memory": {
+            "rss_start_mb": None if rss_start is None else round(rss_start, 1),
+            "rss_end_mb": None if rss_end is None else round(rss_end, 1),
+            "rss_growth_mb": None if rss_start is None or rss_end is None else round(rss_end - rss_start, 1),
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load and latency benchmark for the jshttps ingest/read path")
+    parser.add_argument("--url", help="benchmark a running backend instead of starting one in-process")
+    parser.add_argument("--patients", type=int, default=DEFAULT_PATIENTS)
+    parser.add_argument("--hz", type=float, default=DEFAULT_HZ, help="samples per patient per second (0 = max)")
+    parser.add_argument("--writer-threads", type=int, default=DEFAULT_WRITER_THREADS)
+    parser.add_argument("--dashboards", type=int, default=DEFAULT_DASHBOARDS)
+    parser.add_argument("--refresh", type=float, default=DEFAULT_REFRESH)
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION)
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    server = backend = None
+    with tempfile.TemporaryDirectory() as archive_dir:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            base_url, server, backend = start_local_server(archive_dir)
+        try:
+            results = run_benchmark(base_url, args.patients, args.hz, args.writer_threads,
+                                    args.dashboards, args.refresh, args.duration)
+        finally:
+            if server is not None:
+                server.should_exit = True
+                backend.archive.close()
+
+    results = {
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "server": "external" if args.url else "in-process",
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        **results,
+    }
+    # In-process, client and server share the GIL and the RSS figure
+    for name, op in results["ops"].items():
+        print(f"{name:>11}: {op['count']:>7} ok {sum(op['errors'].values()):>5} err | "
+              f"{op['throughput_per_s']}/s | p50={op['p50_ms']} p95={op['p95_ms']} p99={op['p99_ms']} ms")
+    print(f"target writes/s: {results['target_writes_per_s']} | RSS growth: {results['memory']['rss_growth_mb']} MB")
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import argparse
+import itertools
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from charts import CHART_POINT_BUDGET
+from tick_pipeline import TickPipeline, parse_sample
+from vitals_loader import iter_records
+
+# --- HEADLESS DASHBOARD TICK BENCHMARK ---
+# Replays a recorded stream through TickPipeline at several history sizes and
+# reports where a tick's time and allocations go, stage by stage.
+DEFAULT_SOURCE = "patient_history.csv"
+DEFAULT_SIZES = (200, 2000, 20000)
+DEFAULT_TICKS = 200
+DEFAULT_CAPACITY = 86400  # dashboard.py HISTORY_CAPACITY
+STAGES = ("parse", "score", "append", "alerts", "charts", "serialize")
+
+def load_stream(path):
+    """Recorded samples, cycled forever (the sample CSV is only a few rows)"""
+    records = list(iter_records(path))
+    if not records:
+        raise SystemExit(f"No records in {path}")
+    return itertools.cycle(records)
+
+def run_tick(pipeline, data, now, window, budget, stage_hook):
+    """One dashboard tick, with stage_hook(name, fn) wrapping each stage"""
+    sample = stage_hook("parse", lambda: parse_sample(data, now))
+    assessment, stats = stage_hook("score", lambda: pipeline.score(sample, data))
+    stage_hook("append", lambda: pipeline.append(sample, assessment, stats))
+    stage_hook("alerts", lambda: pipeline.raise_alerts(sample, assessment))
+
+    def refresh_charts():
+        charts = pipeline.update_charts(window, budget)
+        charts.update_radar([sample.hr, sample.temp, sample.systolic, sample.spo2])
+        return charts
+    charts = stage_hook("charts", refresh_charts)
+    # Roughly what st.plotly_chart pays to marshal each figure
+    stage_hook("serialize", lambda: [fig.to_json() for fig in (charts.hr, charts.temp, charts.bp, charts.dual, charts.radar)])
+
+def bench_size(stream, rows, ticks, capacity, budget):
+    pipeline = TickPipeline(capacity)
+    clock = datetime(2024, 1, 1)
+    step = timedelta(seconds=1)
+    for _ in range(rows):
+        pipeline.process(next(stream), clock)
+        clock += step
+    window = capacity
+
+    # Pass 1: wall time per stage
+    seconds = {name: [] for name in STAGES}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        result = fn()
+        seconds[name].append(time.perf_counter() - start)
+        return result
+
+    for _ in range(ticks):
+        run_tick(pipeline, next(stream), clock, window, budget, timed)
+        clock += step
+
+    # Pass 2: allocations per stage (tracemalloc slows everything, so timed separately)
+    peak_bytes = {name: [] for name in STAGES}
+
+    def traced(name, fn):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn()
+        peak_bytes[name].append(tracemalloc.get_traced_memory()[1] - before)
+        return result
+
+    tracemalloc.start()
+    for _ in range(ticks):
+        run_tick(pipeline, next(stream), clock, window, budget, traced)
+        clock += step
+    tracemalloc.stop()
+
+    stages = {}
+    for name in STAGES:
+        us = np.array(seconds[name]) * 1e6
+        stages[name] = {
+            "mean_us": round(float(us.mean()), 1),
+            "p95_us": round(float(np.percentile(us, 95)), 1),
+            "peak_alloc_kb": round(float(np.mean(peak_bytes[name])) / 1024, 1),
+        }
+    total = sum(stage["mean_us"] for stage in stages.values())
+    return {"history_rows": len(pipeline.history), "tick_mean_us": round(total, 1), "stages": stages}
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the dashboard tick pipeline headless, stage by stage")
+    parser.add_argument("source", nargs="?", default=DEFAULT_SOURCE, help=".csv, .json or .ndjson recording")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="history rows before timing")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="timed ticks per size")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY)
+    parser.add_argument("--budget", type=int, default=CHART_POINT_BUDGET, help="chart points per trace")
+    parser.add_argument("-o", "--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    stream = load_stream(args.source)
+    results = []
+    for rows in args.sizes:
+        result = bench_size(stream, rows, args.ticks, args.capacity, args.budget)
+        results.append(result)
+        print(f"\n{rows} history rows: {result['tick_mean_us'] / 1000:.2f} ms per tick")
+        for name, stage in result["stages"].items():
+            share = stage["mean_us"] / result["tick_mean_us"] if result["tick_mean_us"] else 0
+            print(f"  {name:<10} mean {stage['mean_us']:>9.1f} us  p95 {stage['p95_us']:>9.1f} us  "
+                  f"{share:>4.0%}  peak alloc {stage['peak_alloc_kb']:>8.1f} KB")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"source": args.source, "ticks": args.ticks, "budget": args.budget, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
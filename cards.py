@@ -0,0 +1,91 @@
+import html
+
+from alert_engine import Severity, format_alert, RESOLVED
+
+# --- PRECOMPUTED ALERT / INSIGHT CARDS ---
+# Cards are formatted once per alert record version or insight, on the ingestor
+# side, and joined into one HTML block per sidebar filter, so a session's
+# sidebar is a single st.markdown call with no per-render string work.
+ALERT_FILTERS = {"All": None, "Critical": Severity.CRITICAL, "Warning": Severity.WARNING, "Info": Severity.INFO}
+INSIGHT_CARDS = 3  # newest insights shown in the sidebar
+# Urgency keyword in the insight text -> (badge, card accent color); first match wins
+INSIGHT_URGENCY = (
+    ("CRITICAL", "🚨 CRITICAL", "#ff3333"),
+    ("URGENT", "⚠️ URGENT", "#ffaa00"),
+    ("MONITOR", "👁️ MONITOR", "#00d4ff"),
+)
+ROUTINE_URGENCY = ("✓ ROUTINE", "#00d4ff")
+
+def alert_card_html(record):
+    resolved_class = " alert-resolved" if record.state == RESOLVED else ""
+    return f'<div class="alert-{record.severity.label}{resolved_class}">{html.escape(format_alert(record))}</div>'
+
+def insight_urgency(text):
+    """(badge, color) for an insight, from the urgency keyword the prompt asks Gemini for"""
+    for keyword, badge, color in INSIGHT_URGENCY:
+        if keyword in text:
+            return badge, color
+    return ROUTINE_URGENCY
+
+def insight_card_html(insight, color):
+    return (
+        '<div style="background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%); '
+        f'padding: 12px; border-radius: 8px; margin: 8px 0; border-left: 4px solid {color};">'
+        f'<p style="color: #aaa; font-size: 11px; margin: 0;">{html.escape(insight["time"])}</p>'
+        f'<p style="margin: 5px 0; font-size: 13px;">{html.escape(insight["text"])}</p>'
+        '</div>'
+    )
+
+def insight_panel_html(insight, badge):
+    """The main panel's "Latest AI Clinical Assessment" box"""
+    return (
+        '<div class="ai-insight-box">'
+        '<div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">'
+        f'<span style="color: #00d4ff; font-weight: bold; font-size: 14px;">{badge}</span>'
+        f'<span style="color: #888; font-size: 12px;">{html.escape(insight["time"])}</span>'
+        '</div>'
+        f'<p style="font-size: 14px; line-height: 1.6; margin: 10px 0;">{html.escape(insight["text"])}</p>'
+        '<div style="margin-top: 15px; padding-top: 10px; border-top: 1px solid rgba(0,212,255,0.3);">'
+        f'<span style="color: #00d4ff; font-size: 12px;">Computed Risk: {html.escape(str(insight["risk_score"]))}/10</span>'
+        '</div>'
+        '</div>'
+    )
+
+def prepare_insight(insight):
+    """Add 'urgency', 'color', 'card' and 'panel' to a fresh insight dict (once, when it is created)"""
+    badge, color = insight_urgency(insight['text'])
+    insight.update(urgency=badge, color=color, card=insight_card_html(insight, color),
+                   panel=insight_panel_html(insight, badge))
+    return insight
+
+class AlertCards:
+    """Card HTML per alert record, rebuilt only when the record itself changed"""
+
+    def __init__(self):
+        self._cards = {}  # record id -> (record, html)
+
+    def card(self, record):
+        cached = self._cards.get(record.id)
+        if cached is None or cached[0] is not record:
+            cached = self._cards[record.id] = (record, alert_card_html(record))
+        return cached[1]
+
+    def blocks(self, alert_snapshot):
+        """One HTML block per sidebar filter from an AlertSnapshot"""
+        blocks = {}
+        live_ids = set()
+        for name, severity in ALERT_FILTERS.items():
+            records = alert_snapshot.recent if severity is None else alert_snapshot.by_severity[severity]
+            live_ids.update(record.id for record in records)
+            blocks[name] = "".join(self.card(record) for record in records)
+        # Forget cards for records that dropped out of every view
+        for record_id in [rid for rid in self._cards if rid not in live_ids]:
+            del self._cards[record_id]
+        return blocks
+
+    def clear(self):
+        self._cards.clear()
+
+def insight_block(insights, count=INSIGHT_CARDS):
+    """Newest `count` prepared insights, newest first, as one HTML block"""
+    return "".join(insight['card'] for insight in list(insights)[-count:][::-1])
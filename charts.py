@@ -0,0 +1,308 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+# --- PERSISTENT TREND CHARTS (dashboard side) ---
+CHART_HEIGHT = 320
+RADAR_HEIGHT = 380
+RADAR_CATEGORIES = ['Heart Rate', 'Temperature', 'Blood Pressure', 'SpO2']
+RADAR_OPTIMAL = [75, 50, 75, 98]
+# Risk score 0..10 -> marker color (<=2 green, <=4 yellow, <=6 orange, else red)
+RISK_COLOR_EDGES = np.array([2, 4, 6])
+RISK_COLORS = np.array(['#00ff88', '#ffdd00', '#ffaa00', '#ff3333'], dtype=object)
+CHART_POINT_BUDGET = 600  # max points per trace, however long the window
+
+def risk_marker_colors(scores):
+    """Vectorized risk score -> marker color lookup"""
+    return RISK_COLORS[np.searchsorted(RISK_COLOR_EDGES, scores, side='left')]
+
+def minmax_indices(series, budget=CHART_POINT_BUDGET):
+    """Row positions that keep every bucket's min and max of each series, oldest first.
+
+    The rows are split into equal buckets sized so the union of picks stays
+    within `budget`; the first and last rows are always kept, so a transient
+    spike is drawn at its true height however many rows share its bucket.
+    Returns None when the series already fit the budget.
+    """
+    n = len(series[0])
+    if n <= budget:
+        return None
+    n_buckets = max((budget - 2) // (2 * len(series)), 1)
+    width = -(-n // n_buckets)
+    pad = n_buckets * width - n
+    offsets = np.arange(n_buckets) * width
+    picks = [np.array([0, n - 1])]
+    for values in series:
+        values = np.asarray(values, dtype=float)
+        # NaN and padding never win unless a whole bucket is empty
+        low = np.concatenate([np.where(np.isnan(values), np.inf, values), np.full(pad, np.inf)])
+        high = np.concatenate([np.where(np.isnan(values), -np.inf, values), np.full(pad, -np.inf)])
+        picks.append(low.reshape(n_buckets, width).argmin(axis=1) + offsets)
+        picks.append(high.reshape(n_buckets, width).argmax(axis=1) + offsets)
+    idx = np.unique(np.concatenate(picks))
+    return idx[idx < n]
+
+def _downsample(view, names, budget):
+    """Timestamps plus one array per named column, reduced to the point budget"""
+    columns = [view.values(name) for name in names]
+    idx = minmax_indices(columns, budget)
+    times = view.values('Timestamp')
+    if idx is None:
+        return times, columns
+    return times[idx], [values[idx] for values in columns]
+
+# Columns drawn by each trend chart
+CHART_COLUMNS = {'hr': ['HR'], 'temp': ['Temp'], 'bp': ['Systolic', 'Diastolic'], 'dual': ['SpO2', 'RiskScore']}
+
+def chart_series(view, budget=CHART_POINT_BUDGET):
+    """Downsampled (times, columns) per trend chart, copied out of the view.
+
+    The result no longer references the history buffers, so it can be computed
+    once and handed to any number of sessions' TrendCharts.apply().
+    """
+    series = {}
+    for chart, names in CHART_COLUMNS.items():
+        times, columns = _downsample(view, names, budget)
+        series[chart] = (np.array(times), [np.array(values) for values in columns])
+    return series
+
+def _close_loop(values):
+    return list(values) + [values[0]]
+
+def build_hr_figure():
+    fig = go.Figure()
+
+    # Normal range zones
+    fig.add_hrect(y0=0, y1=50, fillcolor="red", opacity=0.05, line_width=0)
+    fig.add_hrect(y0=50, y1=60, fillcolor="yellow", opacity=0.05, line_width=0)
+    fig.add_hrect(y0=60, y1=100, fillcolor="green", opacity=0.1, line_width=0, annotation_text="Normal Range")
+    fig.add_hrect(y0=100, y1=130, fillcolor="yellow", opacity=0.05, line_width=0)
+    fig.add_hrect(y0=130, y1=200, fillcolor="red", opacity=0.05, line_width=0)
+
+    # Add reference lines
+    fig.add_hline(y=60, line_dash="dash", line_color="yellow", opacity=0.5, annotation_text="Lower Limit")
+    fig.add_hline(y=100, line_dash="dash", line_color="yellow", opacity=0.5, annotation_text="Upper Limit")
+
+    fig.add_trace(go.Scatter(
+        x=[], y=[],
+        mode='lines+markers',
+        name='Heart Rate',
+        line=dict(color='#00d4ff', width=2.5),
+        marker=dict(size=5, color=[],
+                    colorscale=[[0, '#00ff88'], [0.5, '#ffaa00'], [1, '#ff3333']],
+                    cmin=50, cmax=130),
+        fill='tozeroy',
+        fillcolor='rgba(0, 212, 255, 0.1)',
+        hovertemplate='<b>%{y} BPM</b><br>Time: %{x|%H:%M:%S}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        template="plotly_dark",
+        height=CHART_HEIGHT,
+        margin=dict(l=20, r=20, t=20, b=20),
+        yaxis_title="BPM",
+        xaxis_title="Time",
+        showlegend=False,
+        hovermode='x unified',
+        yaxis=dict(range=[40, 150])
+    )
+    return fig
+
+def build_temp_figure():
+    fig = go.Figure()
+
+    # Temperature zones
+    fig.add_hrect(y0=94, y1=95, fillcolor="red", opacity=0.05, line_width=0)
+    fig.add_hrect(y0=95, y1=97, fillcolor="yellow", opacity=0.05, line_width=0)
+    fig.add_hrect(y0=97, y1=100, fillcolor="green", opacity=0.1, line_width=0, annotation_text="Normal")
+    fig.add_hrect(y0=100, y1=103, fillcolor="yellow", opacity=0.05, line_width=0)
+    fig.add_hrect(y0=103, y1=106, fillcolor="red", opacity=0.05, line_width=0)
+
+    fig.add_hline(y=100.4, line_dash="dash", line_color="orange", opacity=0.5, annotation_text="Fever Threshold")
+
+    fig.add_trace(go.Scatter(
+        x=[], y=[],
+        mode='lines+markers',
+        name='Temperature',
+        line=dict(color='#ff6b6b', width=2.5),
+        marker=dict(size=5, color=[],
+                    colorscale=[[0, '#00d4ff'], [0.5, '#ffaa00'], [1, '#ff3333']],
+                    cmin=95, cmax=103),
+        fill='tozeroy',
+        fillcolor='rgba(255, 107, 107, 0.1)',
+        hovertemplate='<b>%{y} °F</b><br>Time: %{x|%H:%M:%S}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        template="plotly_dark",
+        height=CHART_HEIGHT,
+        margin=dict(l=20, r=20, t=20, b=20),
+        yaxis_title="°F",
+        xaxis_title="Time",
+        showlegend=False,
+        hovermode='x unified',
+        yaxis=dict(range=[94, 106])
+    )
+    return fig
+
+def build_bp_figure():
+    fig = go.Figure()
+
+    # BP zones
+    fig.add_hrect(y0=90, y1=120, fillcolor="green", opacity=0.08, line_width=0)
+    fig.add_hrect(y0=60, y1=80, fillcolor="green", opacity=0.08, line_width=0)
+
+    fig.add_trace(go.Scatter(
+        x=[], y=[],
+        mode='lines+markers',
+        name='Systolic',
+        line=dict(color='#ff6b6b', width=2.5),
+        marker=dict(size=6, symbol='circle'),
+        hovertemplate='<b>Systolic: %{y} mmHg</b><extra></extra>'
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=[], y=[],
+        mode='lines+markers',
+        name='Diastolic',
+        line=dict(color='#4ecdc4', width=2.5),
+        marker=dict(size=6, symbol='square'),
+        hovertemplate='<b>Diastolic: %{y} mmHg</b><extra></extra>'
+    ))
+
+    # Add reference lines
+    fig.add_hline(y=140, line_dash="dot", line_color="red", opacity=0.4, annotation_text="HTN Threshold", annotation_position="right")
+    fig.add_hline(y=90, line_dash="dot", line_color="yellow", opacity=0.4, annotation_text="Low BP", annotation_position="right")
+
+    fig.update_layout(
+        template="plotly_dark",
+        height=CHART_HEIGHT,
+        margin=dict(l=20, r=20, t=20, b=20),
+        yaxis_title="mmHg",
+        xaxis_title="Time",
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        yaxis=dict(range=[50, 180])
+    )
+    return fig
+
+def build_dual_figure():
+    # Create subplot with dual y-axes
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    # SpO2 trace
+    fig.add_trace(
+        go.Scatter(
+            x=[], y=[],
+            mode='lines+markers',
+            name='SpO2',
+            line=dict(color='#00d4ff', width=2.5),
+            marker=dict(size=6),
+            hovertemplate='<b>SpO2: %{y}%</b><extra></extra>'
+        ),
+        secondary_y=False
+    )
+
+    # Risk Score trace
+    fig.add_trace(
+        go.Scatter(
+            x=[], y=[],
+            mode='lines+markers',
+            name='Risk Score',
+            line=dict(color='#ffa500', width=2),
+            marker=dict(size=8, color=[]),
+            hovertemplate='<b>Risk: %{y}/10</b><extra></extra>'
+        ),
+        secondary_y=True
+    )
+
+    # Add SpO2 critical zone
+    fig.add_hrect(y0=95, y1=100, fillcolor="green", opacity=0.1, line_width=0, secondary_y=False)
+    fig.add_hrect(y0=90, y1=95, fillcolor="yellow", opacity=0.05, line_width=0, secondary_y=False)
+
+    fig.update_xaxes(title_text="Time")
+    fig.update_yaxes(title_text="SpO2 (%)", range=[85, 100], secondary_y=False)
+    fig.update_yaxes(title_text="Risk Score", range=[0, 10], secondary_y=True)
+
+    fig.update_layout(
+        template="plotly_dark",
+        height=CHART_HEIGHT,
+        margin=dict(l=20, r=20, t=20, b=20),
+        hovermode='x unified',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+def build_radar_figure():
+    fig = go.Figure()
+
+    fig.add_trace(go.Scatterpolar(
+        r=[0] * (len(RADAR_CATEGORIES) + 1),
+        theta=_close_loop(RADAR_CATEGORIES),
+        fill='toself',
+        fillcolor='rgba(0, 212, 255, 0.3)',
+        line=dict(color='#00d4ff', width=3),
+        name='Current Vitals'
+    ))
+
+    # Optimal baseline
+    fig.add_trace(go.Scatterpolar(
+        r=_close_loop(RADAR_OPTIMAL),
+        theta=_close_loop(RADAR_CATEGORIES),
+        line=dict(color='#00ff88', width=2, dash='dash'),
+        name='Optimal'
+    ))
+
+    fig.update_layout(
+        template="plotly_dark",
+        height=RADAR_HEIGHT,
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 150],
+                tickvals=[0, 50, 100, 150],
+                ticktext=['0', '50', '100', '150']
+            )
+        ),
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.15, xanchor="center", x=0.5)
+    )
+    return fig
+
+class TrendCharts:
+    """The dashboard's five figures, built once per session and refreshed in place.
+
+    Zones, reference lines, axes and layout are created on construction; each
+    tick only replaces trace data.
+    """
+
+    def __init__(self):
+        self.hr = build_hr_figure()
+        self.temp = build_temp_figure()
+        self.bp = build_bp_figure()
+        self.dual = build_dual_figure()
+        self.radar = build_radar_figure()
+
+    def update(self, view, budget=CHART_POINT_BUDGET):
+        """Point the trend traces at a HistoryView, min/max-downsampled per chart"""
+        self.apply(chart_series(view, budget))
+
+    def apply(self, series):
+        """Swap in precomputed chart_series() data"""
+        times, (hr,) = series['hr']
+        with self.hr.batch_update():
+            self.hr.data[0].update(x=times, y=hr, marker_color=hr)
+        times, (temp,) = series['temp']
+        with self.temp.batch_update():
+            self.temp.data[0].update(x=times, y=temp, marker_color=temp)
+        times, (systolic, diastolic) = series['bp']
+        with self.bp.batch_update():
+            self.bp.data[0].update(x=times, y=systolic)
+            self.bp.data[1].update(x=times, y=diastolic)
+        times, (spo2, risk) = series['dual']
+        with self.dual.batch_update():
+            self.dual.data[0].update(x=times, y=spo2)
+            self.dual.data[1].update(x=times, y=risk, marker_color=risk_marker_colors(risk))
+
+    def update_radar(self, values):
+        self.radar.data[0].r = _close_loop(values)
@@ -1,18 +1,36 @@
 import streamlit as st
 import requests
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from datetime import datetime, timedelta
-import time
+from datetime import datetime
 import google.generativeai as genai
-import numpy as np
-from collections import deque
-import hashlib
+import os
+import socket
+from http_client import PooledClient
+from metrics import REGISTRY, MetricsPusher
+from cards import ALERT_FILTERS
+from charts import TrendCharts
+from ingestor import VitalsIngestor
+from ward import WARD_COLUMNS
 
 # PASTE THIS:
 # 1. Replace with your Render URL from Part 3
 NGROK_URL = "https://vitalguard-api.onrender.com/latest" 
+STREAM_URL = "https://vitalguard-api.onrender.com/stream"
+HTTP_POOL_SIZE = 4
+HTTP_RETRIES = 3
+HISTORY_CAPACITY = 86400  # samples kept per viewed bed (24 h at 1 Hz), shared by all sessions
+CHART_WINDOW = HISTORY_CAPACITY  # most recent samples spanned by the trend charts
+CHART_POINT_BUDGET = 600  # points drawn per trace after min/max downsampling
+AVERAGE_WINDOW_SECONDS = 600  # wall-clock window of the "10-Min Averages" panel
+AI_INTERVAL_SECONDS = 30  # seconds between AI insights per bed (process-wide, not per session)
+METRICS_PUSH_URL = "https://vitalguard-api.onrender.com/metrics/push"
+METRICS_PUSH_INTERVAL = 15  # seconds between metric snapshots sent to the backend's /metrics
+WARD_VIEW = "🏥 Ward overview"  # drill-down selector entry for the all-beds grid
+# Display labels for the detailed view; beds not listed show their patient_id
+PATIENT_LABELS = {"1": ("1BM23CD044", "Room: ICU-3 | Bed: A")}
+
+# Dashboard metrics (get-or-create, so reruns reuse them); pushed to the backend
+LOOP_ERRORS = REGISTRY.counter("vitalguard_dashboard_errors", "Errors caught by the dashboard loop", ["exception"])
+RENDER_SECONDS = REGISTRY.histogram("vitalguard_dashboard_render_seconds", "Time to refresh or draw one chart", ["chart"])
 
 # 2. Load API Key securely from Streamlit Secrets
 try:
@@ -20,199 +38,38 @@ try:
 except FileNotFoundError:
     st.error("Secrets not found. Please set GEMINI_API_KEY in Streamlit Cloud settings.")
 # --- ENHANCED HELPER FUNCTIONS ---
-def generate_unique_key(base_name):
-    """Generate unique keys for Plotly charts to prevent ID conflicts"""
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
-    return f"{base_name}_{timestamp}_{hashlib.md5(str(time.time()).encode()).hexdigest()[:8]}"
-
-def get_live_ai_insight(vitals, history_df, alert_context):
-    """Generate sophisticated AI-powered clinical insights with context"""
-    try:
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        
-        # Calculate trends
-        trend_info = ""
-        if len(history_df) >= 5:
-            recent_hr = history_df['HR'].tail(5).tolist()
-            recent_temp = history_df['Temp'].tail(5).tolist()
-            
-            hr_trend = "increasing" if recent_hr[-1] > recent_hr[0] else "decreasing" if recent_hr[-1] < recent_hr[0] else "stable"
-            temp_trend = "rising" if recent_temp[-1] > recent_temp[0] else "falling" if recent_temp[-1] < recent_temp[0] else "stable"
-            
-            trend_info = f"\nRecent trends: HR is {hr_trend}, Temperature is {temp_trend}"
-        
-        # Build context-aware prompt
-        prompt = f"""You are an expert ICU monitoring AI analyzing real-time patient vitals. Provide a clinical assessment.
-
-CURRENT VITALS:
-- Heart Rate: {vitals['heart_rate']} BPM (Normal: 60-100)
-- Temperature: {vitals['temperature']} °F (Normal: 97-100)
-- Blood Pressure: {vitals['blood_pressure']} mmHg (Normal: 90-120/60-80)
-- SpO2: {vitals.get('spo2', 98)}% (Normal: >95%)
-- Computed Risk Score: {vitals['risk_score']}/10
-{trend_info}
-
-RECENT ALERTS: {', '.join(alert_context[-3:]) if alert_context else 'None'}
-
-TASK:
-1. Identify specific clinical concerns (be explicit about what's abnormal)
-2. Explain the clinical significance (why it matters)
-3. Provide ONE specific, actionable nursing intervention
-4. Rate urgency: ROUTINE / MONITOR CLOSELY / URGENT / CRITICAL
+def render_chart(fig, name):
+    with RENDER_SECONDS.time(chart=name):
+        st.plotly_chart(fig, use_container_width=True, key=f"{name}_chart")
 
-Format: [URGENCY] Clinical finding | Significance | Action
-Keep response to 2-3 sentences maximum."""
-        
-        response = model.generate_content(prompt)
-        return response.text.strip()
-    except Exception as e:
-        # Fallback with actual analysis
-        issues = []
-        if vitals['heart_rate'] > 100:
-            issues.append(f"Tachycardia ({vitals['heart_rate']} BPM)")
-        elif vitals['heart_rate'] < 60:
-            issues.append(f"Bradycardia ({vitals['heart_rate']} BPM)")
-        
-        if vitals['temperature'] > 100.4:
-            issues.append(f"Fever ({vitals['temperature']}°F)")
-        elif vitals['temperature'] < 97:
-            issues.append(f"Hypothermia ({vitals['temperature']}°F)")
-        
-        bp_parts = vitals['blood_pressure'].split('/')
-        if len(bp_parts) == 2:
-            sys, dias = int(bp_parts[0]), int(bp_parts[1])
-            if sys > 140 or dias > 90:
-                issues.append(f"Hypertension ({vitals['blood_pressure']})")
-            elif sys < 90 or dias < 60:
-                issues.append(f"Hypotension ({vitals['blood_pressure']})")
-        
-        if issues:
-            return f"[MONITOR CLOSELY] Detected: {', '.join(issues)}. Risk score {vitals['risk_score']}/10. Recommend: Continue monitoring and notify physician if trends worsen."
-        else:
-            return f"[ROUTINE] Vitals within acceptable parameters. Risk score {vitals['risk_score']}/10. Continue routine monitoring."
-
-def calculate_advanced_risk_score(hr, temp, systolic, diastolic, spo2=98, history_df=None):
-    """Enhanced risk calculation with trend analysis and multi-factor scoring"""
-    risk = 0
-    risk_factors = []
-    
-    # Heart rate with graduated severity
-    if hr < 50:
-        risk += 4
-        risk_factors.append("Severe Bradycardia")
-    elif hr < 60:
-        risk += 2
-        risk_factors.append("Bradycardia")
-    elif hr > 130:
-        risk += 4
-        risk_factors.append("Severe Tachycardia")
-    elif hr > 100:
-        risk += 2
-        risk_factors.append("Tachycardia")
-    
-    # Temperature with fever grades
-    if temp > 103:
-        risk += 4
-        risk_factors.append("High-grade Fever")
-    elif temp > 100.4:
-        risk += 2
-        risk_factors.append("Fever")
-    elif temp < 95:
-        risk += 4
-        risk_factors.append("Severe Hypothermia")
-    elif temp < 97:
-        risk += 2
-        risk_factors.append("Mild Hypothermia")
-    
-    # Blood pressure with hypertensive crisis detection
-    if systolic > 180 or diastolic > 120:
-        risk += 5
-        risk_factors.append("Hypertensive Crisis")
-    elif systolic > 140 or diastolic > 90:
-        risk += 2
-        risk_factors.append("Hypertension")
-    elif systolic < 80 or diastolic < 50:
-        risk += 5
-        risk_factors.append("Severe Hypotension")
-    elif systolic < 90 or diastolic < 60:
-        risk += 3
-        risk_factors.append("Hypotension")
-    
-    # SpO2 scoring
-    if spo2 < 90:
-        risk += 5
-        risk_factors.append("Critical Hypoxemia")
-    elif spo2 < 95:
-        risk += 3
-        risk_factors.append("Hypoxemia")
-    
-    # Trend analysis (if history available)
-    if history_df is not None and len(history_df) >= 5:
-        recent_risks = history_df['RiskScore'].tail(5).tolist()
-        if len(recent_risks) >= 2:
-            
-            # Rapid deterioration detection
-            if recent_risks[-1] - recent_risks[0] >= 3:
-                risk += 2
-                risk_factors.append("Rapid Deterioration")
-            
-            # Sustained elevation
-            if all(r >= 5 for r in recent_risks[-3:]):
-                risk += 1
-                risk_factors.append("Sustained High Risk")
-    
-    # Multi-organ involvement (combination of abnormalities)
-    abnormal_count = sum([
-        hr < 60 or hr > 100,
-        temp < 97 or temp > 100.4,
-        systolic < 90 or systolic > 140,
-        diastolic < 60 or diastolic > 90,
-        spo2 < 95
-    ])
-    
-    if abnormal_count >= 3:
-        risk += 2
-        risk_factors.append("Multi-system Involvement")
-    
-    return min(risk, 10), risk_factors
+@st.cache_resource
+def start_metrics_pusher():
+    """One pusher per Streamlit process: the registry is shared by all its sessions"""
+    token = st.secrets.get("METRICS_PUSH_TOKEN")
+    if not token:
+        return None  # the backend only accepts pushes carrying its shared token
+    source = f"dashboard-{socket.gethostname()}-{os.getpid()}"
+    pusher = MetricsPusher(METRICS_PUSH_URL, PooledClient(pool_size=1, retries=0), source, token, METRICS_PUSH_INTERVAL)
+    pusher.start()
+    return pusher
 
-def get_risk_level(score):
-    """Enhanced risk categorization"""
-    if score <= 2:
-        return "Low", "#00ff88", "✓"
-    elif score <= 4:
-        return "Moderate", "#ffdd00", "⚠"
-    elif score <= 6:
-        return "Elevated", "#ffaa00", "⚠⚠"
-    elif score <= 8:
-        return "High", "#ff6600", "⚠⚠⚠"
-    else:
-        return "Critical", "#ff3333", "🚨"
+@st.cache_resource
+def start_ingestor():
+    """One ingestor per Streamlit process: it fetches, scores and requests insights once per bed,
+    and every browser session only renders its results"""
+    client = PooledClient(pool_size=HTTP_POOL_SIZE, retries=HTTP_RETRIES)
+    ingestor = VitalsIngestor(
+        STREAM_URL, NGROK_URL, client,
+        history_capacity=HISTORY_CAPACITY,
+        ai_interval=AI_INTERVAL_SECONDS,
+        average_window=AVERAGE_WINDOW_SECONDS
+    )
+    ingestor.start()
+    return ingestor
 
-def get_vital_status(vital_type, value):
-    """Determine if a vital is in normal, warning, or critical range"""
-    ranges = {
-        'hr': {'critical_low': 50, 'low': 60, 'high': 100, 'critical_high': 130},
-        'temp': {'critical_low': 95, 'low': 97, 'high': 100, 'critical_high': 103},
-        'systolic': {'critical_low': 80, 'low': 90, 'high': 140, 'critical_high': 180},
-        'diastolic': {'critical_low': 50, 'low': 60, 'high': 90, 'critical_high': 120},
-        'spo2': {'critical_low': 90, 'low': 95, 'high': 100, 'critical_high': 100}
-    }
-    
-    r = ranges.get(vital_type, {})
-    if not r:
-        return 'normal', '#00ff88'
-    
-    if value <= r.get('critical_low', 0):
-        return 'critical', '#ff3333'
-    elif value < r.get('low', 0):
-        return 'warning', '#ffaa00'
-    elif value > r.get('critical_high', 999):
-        return 'critical', '#ff3333'
-    elif value > r.get('high', 999):
-        return 'warning', '#ffaa00'
-    else:
-        return 'normal', '#00ff88'
+def back_to_ward():
+    # Widget callback: runs before the rerun, so the selectbox can still be changed
+    st.session_state.view_select = WARD_VIEW
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -290,6 +147,11 @@ st.markdown("""
         box-shadow: 0 4px 15px rgba(0,212,255,0.3);
     }
     
+    .alert-resolved {
+        opacity: 0.55;
+        animation: none;
+    }
+    
     @keyframes pulse {
         0%, 100% { opacity: 1; transform: scale(1); }
         50% { opacity: 0.85; transform: scale(1.02); }
@@ -346,32 +208,60 @@ st.markdown("""
     .vital-normal { color: #00ff88; font-weight: 600; }
     .vital-warning { color: #ffaa00; font-weight: 600; }
     .vital-critical { color: #ff3333; font-weight: 700; animation: pulse 2s infinite; }
+    
+    .ward-grid {
+        display: grid;
+        gap: 12px;
+    }
+    
+    .ward-tile {
+        background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
+        padding: 10px 12px;
+        border-radius: 10px;
+    }
+    
+    .ward-tile-head {
+        display: flex;
+        justify-content: space-between;
+        align-items: center;
+        margin-bottom: 6px;
+    }
+    
+    .ward-tile .status-badge { padding: 3px 10px; font-size: 11px; }
+    .ward-vitals { display: flex; justify-content: space-between; font-size: 13px; font-weight: 600; }
+    .ward-factors { color: #aaa; font-size: 11px; margin-top: 4px; }
     </style>
     """, unsafe_allow_html=True)
 
 # --- ENHANCED STATE INITIALIZATION ---
-if 'history' not in st.session_state:
-    st.session_state.history = pd.DataFrame(columns=[
-        'Time', 'Timestamp', 'HR', 'Temp', 'Systolic', 'Diastolic', 'SpO2', 'RiskScore', 'RiskFactors'
-    ])
-
-if 'alerts' not in st.session_state:
-    st.session_state.alerts = deque(maxlen=50)  # Use deque for better performance
-
-if 'ai_insights' not in st.session_state:
-    st.session_state.ai_insights = deque(maxlen=20)
-
-if 'last_ai_call' not in st.session_state:
-    st.session_state.last_ai_call = datetime.now() - timedelta(seconds=30)
-
-if 'alert_context' not in st.session_state:
-    st.session_state.alert_context = deque(maxlen=10)
+# Stream, scoring, alerts and AI insights live in the process-wide ingestor
+# (ingestor.py); a session only keeps what it draws with
+ingestor = start_ingestor()
+start_metrics_pusher()
 
 if 'session_start' not in st.session_state:
     st.session_state.session_start = datetime.now()
 
-if 'total_alerts' not in st.session_state:
-    st.session_state.total_alerts = {'critical': 0, 'warning': 0, 'info': 0}
+# This session's figures, refreshed in place from the shared chart data
+if 'charts' not in st.session_state:
+    st.session_state.charts = TrendCharts()
+charts = st.session_state.charts
+
+# --- VIEW SELECTION (ward grid or drill-down into one bed) ---
+with st.sidebar:
+    st.header("🏥 Ward")
+    ward_beds = ingestor.patient_ids()
+    view = st.selectbox(
+        "View", [WARD_VIEW] + ward_beds, key="view_select",
+        format_func=lambda pid: pid if pid == WARD_VIEW else f"🛏️ Bed {pid}"
+    )
+    selected_patient = None if view == WARD_VIEW else view
+    if selected_patient is not None:
+        st.button("⬅️ Back to ward", on_click=back_to_ward, use_container_width=True)
+
+# Subscribing makes the ingestor track this bed in detail (shared with other sessions)
+feed = None if selected_patient is None else ingestor.subscribe(selected_patient)
+snapshot = None if feed is None else feed.snapshot
 
 # --- ENHANCED HEADER ---
 col1, col2, col3 = st.columns([2, 1, 1])
@@ -382,8 +272,13 @@ with col1:
     st.caption(f"Session Duration: {str(session_duration).split('.')[0]}")
 
 with col2:
-    st.markdown("### **Patient ID: 1BM23CD044**")
-    st.caption("Room: ICU-3 | Bed: A")
+    if selected_patient is None:
+        st.markdown(f"### **Ward Overview: {len(ward_beds)} beds**")
+        st.caption("Sickest first · pick a bed under View to drill down")
+    else:
+        patient_label, location = PATIENT_LABELS.get(selected_patient, (selected_patient, f"Bed: {selected_patient}"))
+        st.markdown(f"### **Patient ID: {patient_label}**")
+        st.caption(location)
 
 with col3:
     current_time = datetime.now()
@@ -397,670 +292,317 @@ with st.sidebar:
     st.header("⚙️ Dashboard Controls")
     
     # Refresh rate control
-    refresh_rate = st.slider("Refresh Rate (seconds)", 1, 10, 2, help="Update frequency for vital signs")
-    
-    # AI insight interval
-    ai_interval = st.slider("AI Analysis Interval (seconds)", 15, 60, 30, help="How often to generate AI insights")
+    refresh_rate = st.slider("Refresh Rate (seconds)", 1, 10, 2, help="Minimum time between redraws; every pushed sample is still recorded")
+    st.caption(f"AI analysis every {AI_INTERVAL_SECONDS} s per bed, shared by all viewers")
     
     st.write("---")
-    st.header("📊 Session Statistics")
-    
-    col_a, col_b = st.columns(2)
-    with col_a:
-        st.metric("Total Alerts", len(st.session_state.alerts))
-    with col_b:
-        st.metric("Critical", st.session_state.total_alerts['critical'])
-    
-    col_c, col_d = st.columns(2)
-    with col_c:
-        st.metric("Warnings", st.session_state.total_alerts['warning'])
-    with col_d:
-        st.metric("Info", st.session_state.total_alerts['info'])
-    
-    st.write("---")
-    st.header("⚠️ Clinical Alerts")
-    
-    if not st.session_state.alerts:
-        st.info("✓ No active alerts - Patient stable")
-    else:
-        alert_filter = st.selectbox("Filter Alerts", ["All", "Critical", "Warning", "Info"], key="alert_filter_select")
-        
-        displayed_alerts = 0
-        for alert in reversed(list(st.session_state.alerts)):
-            # Determine alert type and display accordingly
-            if "CRITICAL" in alert or "🚨" in alert:
-                if alert_filter in ["All", "Critical"]:
-                    st.markdown(f'<div class="alert-critical">{alert}</div>', unsafe_allow_html=True)
-                    displayed_alerts += 1
-            elif "Warning" in alert or "⚠️" in alert:
-                if alert_filter in ["All", "Warning"]:
-                    st.markdown(f'<div class="alert-warning">{alert}</div>', unsafe_allow_html=True)
-                    displayed_alerts += 1
-            else:
-                if alert_filter in ["All", "Info"]:
-                    st.markdown(f'<div class="alert-info">{alert}</div>', unsafe_allow_html=True)
-                    displayed_alerts += 1
-            
-            if displayed_alerts >= 10:  # Limit displayed alerts
-                break
+    if snapshot is not None:
+        st.header("📊 Session Statistics")
+    
+        # Counts are notifications: a condition that persists is counted once
+        alert_counts = snapshot.alerts.counts
+        col_a, col_b = st.columns(2)
+        with col_a:
+            st.metric("Total Alerts", sum(alert_counts.values()))
+        with col_b:
+            st.metric("Critical", alert_counts['critical'])
+    
+        col_c, col_d = st.columns(2)
+        with col_c:
+            st.metric("Warnings", alert_counts['warning'])
+        with col_d:
+            st.metric("Active", snapshot.alerts.active)
+    
+        st.write("---")
+        st.header("⚠️ Clinical Alerts")
+    
+        if not snapshot.alerts.recent:
+            st.info("✓ No active alerts - Patient stable")
+        else:
+            alert_filter = st.selectbox("Filter Alerts", list(ALERT_FILTERS), key="alert_filter_select")
+            # Newest first, formatted once by the ingestor (cards.py): one markdown call per filter
+            st.markdown(snapshot.alert_html[alert_filter], unsafe_allow_html=True)
     
-    st.write("---")
-    st.header("🤖 AI Clinical Insights")
+        st.write("---")
+        st.header("🤖 AI Clinical Insights")
+        cache_stats = ingestor.insight_worker.cache.stats()
+        st.caption(f"Insight cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%})")
     
-    if not st.session_state.ai_insights:
-        st.info("🔄 AI analysis initializing...")
-    else:
-        for idx, insight in enumerate(reversed(list(st.session_state.ai_insights)[:3])):
-            urgency_color = "#ff3333" if "CRITICAL" in insight['text'] else "#ffaa00" if "URGENT" in insight['text'] else "#00d4ff"
-            st.markdown(f"""
-            <div style="background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%); 
-                        padding: 12px; border-radius: 8px; margin: 8px 0;
-                        border-left: 4px solid {urgency_color};">
-                <p style="color: #aaa; font-size: 11px; margin: 0;">{insight['time']}</p>
-                <p style="margin: 5px 0; font-size: 13px;">{insight['text']}</p>
-            </div>
-            """, unsafe_allow_html=True)
+        if not snapshot.insights:
+            st.info("🔄 AI analysis initializing...")
+        else:
+            st.markdown(snapshot.insight_html, unsafe_allow_html=True)
+    elif feed is not None:
+        st.info("🔄 Waiting for this bed's first sample...")
     
     st.write("---")
+    # Patient history is shared with every other viewer, so a reset only restarts this session's view
     if st.button("🔄 Reset Dashboard", use_container_width=True):
-        st.session_state.history = pd.DataFrame(columns=[
-            'Time', 'Timestamp', 'HR', 'Temp', 'Systolic', 'Diastolic', 'SpO2', 'RiskScore', 'RiskFactors'
-        ])
-        st.session_state.alerts.clear()
-        st.session_state.ai_insights.clear()
-        st.session_state.total_alerts = {'critical': 0, 'warning': 0, 'info': 0}
+        st.session_state.charts = TrendCharts()
         st.session_state.session_start = datetime.now()
         st.rerun()
 
 # --- MAIN DASHBOARD ---
-placeholder = st.empty()
+# Each view is a fragment that reruns on its own every refresh_rate seconds: the
+# rest of the page is not re-executed, and charts keep the same keys across
+# reruns, so Streamlit updates the existing elements instead of remounting them.
+beds_in_selector = len(ward_beds)
 
-while True:
+@st.fragment(run_every=refresh_rate)
+def render_ward():
+    """Ward overview: every bed from the shared ingestor's stream, drawn as one HTML block"""
     try:
-        # Fetch data
-        data = requests.get(NGROK_URL, timeout=5).json()
-        
-        # Data processing with robust type conversion
         now = datetime.now()
-        time_str = now.strftime("%H:%M:%S")
-        hr = round(float(data.get('heart_rate', 0)), 1)
-        temp = round(float(data.get('body_temperature', 98.6)), 1)
-        systolic = int(round(float(data.get('systolic_bp', 120))))
-        diastolic = int(round(float(data.get('diastolic_bp', 80))))
-        spo2 = int(round(float(data.get('spo2', 98))))
-                
-        # Calculate advanced risk score
-        risk_score, risk_factors = calculate_advanced_risk_score(
-            hr, temp, systolic, diastolic, spo2, st.session_state.history
-        )
-        risk_level, risk_color, risk_icon = get_risk_level(risk_score)
+        counts, ward_html, bed_count = ingestor.ward_view(now, WARD_COLUMNS)
         
-        # Update history
-        new_row = {
-            'Time': time_str,
-            'Timestamp': now,
-            'HR': hr,
-            'Temp': temp,
-            'Systolic': systolic,
-            'Diastolic': diastolic,
-            'SpO2': spo2,
-            'RiskScore': risk_score,
-            'RiskFactors': ', '.join(risk_factors) if risk_factors else 'None'
-        }
-        st.session_state.history = pd.concat(
-            [st.session_state.history, pd.DataFrame([new_row])], 
-            ignore_index=True
-        ).tail(200)  # Keep more history for better trending
+        # New beds: rerun the whole app so the View selector can offer them
+        if bed_count > beds_in_selector:
+            st.rerun()
         
-        # Enhanced alert generation with severity classification
-        new_alerts_generated = False
-        
-        # Heart rate alerts
-        if hr > 130:
-            alert_msg = f"[{time_str}] 🚨 CRITICAL: Severe Tachycardia - {hr} BPM | Immediate intervention required"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Critical HR: {hr}")
-            st.session_state.total_alerts['critical'] += 1
-            new_alerts_generated = True
-        elif hr > 100:
-            alert_msg = f"[{time_str}] ⚠️ WARNING: Tachycardia - {hr} BPM | Monitor closely"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"High HR: {hr}")
-            st.session_state.total_alerts['warning'] += 1
-            new_alerts_generated = True
-        elif hr < 50:
-            alert_msg = f"[{time_str}] 🚨 CRITICAL: Severe Bradycardia - {hr} BPM | Urgent assessment needed"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Critical HR: {hr}")
-            st.session_state.total_alerts['critical'] += 1
-            new_alerts_generated = True
-        elif hr < 60:
-            alert_msg = f"[{time_str}] ⚠️ WARNING: Bradycardia - {hr} BPM | Continue monitoring"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Low HR: {hr}")
-            st.session_state.total_alerts['warning'] += 1
-            new_alerts_generated = True
-        
-        # Temperature alerts
-        if temp > 103:
-            alert_msg = f"[{time_str}] 🚨 CRITICAL: High-grade Fever - {temp} °F | Antipyretics & cooling measures"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Critical Temp: {temp}")
-            st.session_state.total_alerts['critical'] += 1
-            new_alerts_generated = True
-        elif temp > 100.4:
-            alert_msg = f"[{time_str}] ⚠️ WARNING: Fever detected - {temp} °F | Consider antipyretics"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Elevated Temp: {temp}")
-            st.session_state.total_alerts['warning'] += 1
-            new_alerts_generated = True
-        elif temp < 95:
-            alert_msg = f"[{time_str}] 🚨 CRITICAL: Severe Hypothermia - {temp} °F | Warming protocol initiated"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Critical Temp: {temp}")
-            st.session_state.total_alerts['critical'] += 1
-            new_alerts_generated = True
-        elif temp < 97:
-            alert_msg = f"[{time_str}] ⚠️ WARNING: Mild Hypothermia - {temp} °F | Apply warming measures"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Low Temp: {temp}")
-            st.session_state.total_alerts['warning'] += 1
-            new_alerts_generated = True
-        
-        # Blood pressure alerts
-        if systolic > 180 or diastolic > 120:
-            alert_msg = f"[{time_str}] 🚨 CRITICAL: Hypertensive Crisis - {systolic}/{diastolic} | Urgent BP control needed"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Critical BP: {systolic}/{diastolic}")
-            st.session_state.total_alerts['critical'] += 1
-            new_alerts_generated = True
-        elif systolic > 140 or diastolic > 90:
-            alert_msg = f"[{time_str}] ⚠️ WARNING: Hypertension - {systolic}/{diastolic} | Monitor and document"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"High BP: {systolic}/{diastolic}")
-            st.session_state.total_alerts['warning'] += 1
-            new_alerts_generated = True
-        elif systolic < 80 or diastolic < 50:
-            alert_msg = f"[{time_str}] 🚨 CRITICAL: Severe Hypotension - {systolic}/{diastolic} | Fluid resuscitation/pressors"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Critical BP: {systolic}/{diastolic}")
-            st.session_state.total_alerts['critical'] += 1
-            new_alerts_generated = True
-        elif systolic < 90 or diastolic < 60:
-            alert_msg = f"[{time_str}] ⚠️ WARNING: Hypotension - {systolic}/{diastolic} | Assess perfusion"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Low BP: {systolic}/{diastolic}")
-            st.session_state.total_alerts['warning'] += 1
-            new_alerts_generated = True
-        
-        # SpO2 alerts
-        if spo2 < 90:
-            alert_msg = f"[{time_str}] 🚨 CRITICAL: Severe Hypoxemia - SpO2 {spo2}% | Increase O2, assess airway"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Critical SpO2: {spo2}")
-            st.session_state.total_alerts['critical'] += 1
-            new_alerts_generated = True
-        elif spo2 < 95:
-            alert_msg = f"[{time_str}] ⚠️ WARNING: Low SpO2 - {spo2}% | Supplemental oxygen recommended"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append(f"Low SpO2: {spo2}")
-            st.session_state.total_alerts['warning'] += 1
-            new_alerts_generated = True
-        
-        # Multi-system alert
-        if len(risk_factors) >= 3:
-            alert_msg = f"[{time_str}] 🚨 CRITICAL: Multi-system involvement detected | Factors: {', '.join(risk_factors[:3])}"
-            st.session_state.alerts.append(alert_msg)
-            st.session_state.alert_context.append("Multi-system alert")
-            st.session_state.total_alerts['critical'] += 1
-            new_alerts_generated = True
+        if not ingestor.reader.connected and ingestor.reader.last_error is not None:
+            st.warning(f"🔌 Stream disconnected ({type(ingestor.reader.last_error).__name__}); reconnecting...")
+        count_cols = st.columns(6)
+        for col, level in zip(count_cols, ["Critical", "High", "Elevated", "Moderate", "Low", "No signal"]):
+            with col:
+                st.metric(level, counts.get(level, 0))
+
+        st.write("---")
+        if bed_count == 0:
+            st.info("🔄 Waiting for the first bed to report...")
+        else:
+            with RENDER_SECONDS.time(chart="ward_grid"):
+                st.markdown(ward_html, unsafe_allow_html=True)
+
         
-        # AI insight generation (configurable interval)
-        time_since_last_ai = (now - st.session_state.last_ai_call).seconds
-        should_generate_ai = time_since_last_ai >= ai_interval
+    except Exception as e:
+        LOOP_ERRORS.inc(exception=type(e).__name__)
+        st.error(f"⚠️ System Error: {type(e).__name__}")
+        st.warning(f"Details: {str(e)}")
+        st.info(f"Dashboard will retry in {refresh_rate} seconds...")
+
+@st.fragment(run_every=refresh_rate)
+def render_bed():
+    """Drill-down: the detailed view of the selected bed, rendered from the shared feed"""
+    seen_key = f"seen_version_{selected_patient}"
+    try:
+        # Reading the feed also keeps the ingestor tracking this bed in detail
+        snapshot = feed.wait(0, timeout=0)
+        if snapshot is None:
+            ingestor.raise_stream_error()
+            st.info("🔄 Waiting for this bed's first sample...")
+            return
+        if snapshot.version == st.session_state.get(seen_key):
+            # Nothing new since the last redraw: surface a dropped stream
+            ingestor.raise_stream_error()
+        st.session_state[seen_key] = snapshot.version
         
-        # Force AI generation if new critical alerts
-        if new_alerts_generated and any("CRITICAL" in str(a) for a in list(st.session_state.alerts)[-3:]):
-            should_generate_ai = True
+        tick = snapshot.tick
+        sample, assessment = tick.sample, tick.assessment
+        hr, temp, spo2 = sample.hr, sample.temp, sample.spo2
+        systolic, diastolic = sample.systolic, sample.diastolic
+        risk_score, risk_factors = assessment.risk, assessment.risk_factors
+        risk_level, risk_color, risk_icon = tick.risk_level
         
-        if should_generate_ai:
-            vitals_summary = {
-                'heart_rate': hr,
-                'temperature': temp,
-                'blood_pressure': f"{systolic}/{diastolic}",
-                'spo2': spo2,
-                'risk_score': risk_score
-            }
-            ai_insight = get_live_ai_insight(
-                vitals_summary, 
-                st.session_state.history,
-                list(st.session_state.alert_context)
+        # --- ROW 1: KEY METRICS ---
+        metric_cols = st.columns(5)
+
+        hr_status, hr_color = assessment.status['hr']
+        temp_status, temp_color = assessment.status['temp']
+        sys_status, sys_color = assessment.status['systolic']
+        spo2_status, spo2_color = assessment.status['spo2']
+
+        with metric_cols[0]:
+            delta_hr = "Normal" if hr_status == 'normal' else "ABNORMAL"
+            st.metric(
+                "💓 Heart Rate", 
+                f"{hr} BPM", 
+                delta=delta_hr,
+                delta_color="off" if hr_status == 'normal' else "inverse"
             )
-            st.session_state.ai_insights.append({
-                'time': time_str,
-                'text': ai_insight,
-                'risk_score': risk_score
-            })
-            st.session_state.last_ai_call = now
-        
-        # Render dashboard
-        with placeholder.container():
-            # --- ROW 1: KEY METRICS ---
-            metric_cols = st.columns(5)
-            
-            hr_status, hr_color = get_vital_status('hr', hr)
-            temp_status, temp_color = get_vital_status('temp', temp)
-            sys_status, sys_color = get_vital_status('systolic', systolic)
-            spo2_status, spo2_color = get_vital_status('spo2', spo2)
-            
-            with metric_cols[0]:
-                delta_hr = "Normal" if hr_status == 'normal' else "ABNORMAL"
-                st.metric(
-                    "💓 Heart Rate", 
-                    f"{hr} BPM", 
-                    delta=delta_hr,
-                    delta_color="off" if hr_status == 'normal' else "inverse"
-                )
-                st.markdown(f'<p class="vital-{hr_status}">Status: {hr_status.upper()}</p>', unsafe_allow_html=True)
-            
-            with metric_cols[1]:
-                delta_temp = "Normal" if temp_status == 'normal' else "ABNORMAL"
-                st.metric(
-                    "🌡️ Temperature", 
-                    f"{temp} °F", 
-                    delta=delta_temp,
-                    delta_color="off" if temp_status == 'normal' else "inverse"
-                )
-                st.markdown(f'<p class="vital-{temp_status}">Status: {temp_status.upper()}</p>', unsafe_allow_html=True)
-            
-            with metric_cols[2]:
-                bp_status = "Normal" if sys_status == 'normal' else "ABNORMAL"
-                st.metric(
-                    "🩸 Blood Pressure", 
-                    f"{systolic}/{diastolic}",
-                    delta=bp_status,
-                    delta_color="off" if sys_status == 'normal' else "inverse"
-                )
-                st.markdown(f'<p class="vital-{sys_status}">Status: {sys_status.upper()}</p>', unsafe_allow_html=True)
-            
-            with metric_cols[3]:
-                delta_spo2 = "Optimal" if spo2_status == 'normal' else "LOW"
-                st.metric(
-                    "🫁 SpO2", 
-                    f"{spo2}%", 
-                    delta=delta_spo2,
-                    delta_color="off" if spo2_status == 'normal' else "inverse"
-                )
-                st.markdown(f'<p class="vital-{spo2_status}">Status: {spo2_status.upper()}</p>', unsafe_allow_html=True)
-            
-            with metric_cols[4]:
-                st.markdown(f'<div class="risk-indicator" style="background-color: {risk_color};">{risk_icon} {risk_level}</div>', unsafe_allow_html=True)
-                st.metric(
-                    "Risk Score",
-                    f"{risk_score}/10",
-                    delta=f"{len(risk_factors)} factors" if risk_factors else "No factors",
-                    delta_color="inverse" if risk_score > 4 else "off"
-                )
-            
-            # Risk factors display
-            if risk_factors:
-                st.markdown(f"""
-                <div class="stat-highlight">
-                    <strong>Active Risk Factors:</strong> {', '.join(risk_factors)}
-                </div>
-                """, unsafe_allow_html=True)
-            
-            st.write("---")
-            
-            # --- ROW 2: TREND GRAPHS ---
-            graph_col1, graph_col2 = st.columns(2)
-            
-            with graph_col1:
-                st.subheader("📈 Heart Rate Trend Analysis")
-                fig_hr = go.Figure()
-                
-                # Normal range zones
-                fig_hr.add_hrect(y0=0, y1=50, fillcolor="red", opacity=0.05, line_width=0)
-                fig_hr.add_hrect(y0=50, y1=60, fillcolor="yellow", opacity=0.05, line_width=0)
-                fig_hr.add_hrect(y0=60, y1=100, fillcolor="green", opacity=0.1, line_width=0, annotation_text="Normal Range")
-                fig_hr.add_hrect(y0=100, y1=130, fillcolor="yellow", opacity=0.05, line_width=0)
-                fig_hr.add_hrect(y0=130, y1=200, fillcolor="red", opacity=0.05, line_width=0)
-                
-                # Add reference lines
-                fig_hr.add_hline(y=60, line_dash="dash", line_color="yellow", opacity=0.5, annotation_text="Lower Limit")
-                fig_hr.add_hline(y=100, line_dash="dash", line_color="yellow", opacity=0.5, annotation_text="Upper Limit")
-                
-                fig_hr.add_trace(go.Scatter(
-                    x=st.session_state.history['Time'],
-                    y=st.session_state.history['HR'],
-                    mode='lines+markers',
-                    name='Heart Rate',
-                    line=dict(color='#00d4ff', width=2.5),
-                    marker=dict(size=5, color=st.session_state.history['HR'],
-                               colorscale=[[0, '#00ff88'], [0.5, '#ffaa00'], [1, '#ff3333']],
-                               cmin=50, cmax=130),
-                    fill='tozeroy',
-                    fillcolor='rgba(0, 212, 255, 0.1)',
-                    hovertemplate='<b>%{y} BPM</b><br>Time: %{x}<extra></extra>'
-                ))
-                
-                fig_hr.update_layout(
-                    template="plotly_dark",
-                    height=320,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    yaxis_title="BPM",
-                    xaxis_title="Time",
-                    showlegend=False,
-                    hovermode='x unified',
-                    yaxis=dict(range=[40, 150])
-                )
-                st.plotly_chart(fig_hr, use_container_width=True, key=generate_unique_key("hr_chart"))
-            
-            with graph_col2:
-                st.subheader("🌡️ Temperature Trend Analysis")
-                fig_temp = go.Figure()
-                
-                # Temperature zones
-                fig_temp.add_hrect(y0=94, y1=95, fillcolor="red", opacity=0.05, line_width=0)
-                fig_temp.add_hrect(y0=95, y1=97, fillcolor="yellow", opacity=0.05, line_width=0)
-                fig_temp.add_hrect(y0=97, y1=100, fillcolor="green", opacity=0.1, line_width=0, annotation_text="Normal")
-                fig_temp.add_hrect(y0=100, y1=103, fillcolor="yellow", opacity=0.05, line_width=0)
-                fig_temp.add_hrect(y0=103, y1=106, fillcolor="red", opacity=0.05, line_width=0)
-                
-                fig_temp.add_hline(y=100.4, line_dash="dash", line_color="orange", opacity=0.5, annotation_text="Fever Threshold")
-                
-                fig_temp.add_trace(go.Scatter(
-                    x=st.session_state.history['Time'],
-                    y=st.session_state.history['Temp'],
-                    mode='lines+markers',
-                    name='Temperature',
-                    line=dict(color='#ff6b6b', width=2.5),
-                    marker=dict(size=5, color=st.session_state.history['Temp'],
-                               colorscale=[[0, '#00d4ff'], [0.5, '#ffaa00'], [1, '#ff3333']],
-                               cmin=95, cmax=103),
-                    fill='tozeroy',
-                    fillcolor='rgba(255, 107, 107, 0.1)',
-                    hovertemplate='<b>%{y} °F</b><br>Time: %{x}<extra></extra>'
-                ))
-                
-                fig_temp.update_layout(
-                    template="plotly_dark",
-                    height=320,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    yaxis_title="°F",
-                    xaxis_title="Time",
-                    showlegend=False,
-                    hovermode='x unified',
-                    yaxis=dict(range=[94, 106])
-                )
-                st.plotly_chart(fig_temp, use_container_width=True, key=generate_unique_key("temp_chart"))
-            
-            # --- ROW 3: BLOOD PRESSURE & SPO2 ---
-            graph_col3, graph_col4 = st.columns(2)
-            
-            with graph_col3:
-                st.subheader("🩸 Blood Pressure Dynamics")
-                fig_bp = go.Figure()
-                
-                # BP zones
-                fig_bp.add_hrect(y0=90, y1=120, fillcolor="green", opacity=0.08, line_width=0)
-                fig_bp.add_hrect(y0=60, y1=80, fillcolor="green", opacity=0.08, line_width=0)
-                
-                fig_bp.add_trace(go.Scatter(
-                    x=st.session_state.history['Time'],
-                    y=st.session_state.history['Systolic'],
-                    mode='lines+markers',
-                    name='Systolic',
-                    line=dict(color='#ff6b6b', width=2.5),
-                    marker=dict(size=6, symbol='circle'),
-                    hovertemplate='<b>Systolic: %{y} mmHg</b><extra></extra>'
-                ))
-                
-                fig_bp.add_trace(go.Scatter(
-                    x=st.session_state.history['Time'],
-                    y=st.session_state.history['Diastolic'],
-                    mode='lines+markers',
-                    name='Diastolic',
-                    line=dict(color='#4ecdc4', width=2.5),
-                    marker=dict(size=6, symbol='square'),
-                    hovertemplate='<b>Diastolic: %{y} mmHg</b><extra></extra>'
-                ))
-                
-                # Add reference lines
-                fig_bp.add_hline(y=140, line_dash="dot", line_color="red", opacity=0.4, annotation_text="HTN Threshold", annotation_position="right")
-                fig_bp.add_hline(y=90, line_dash="dot", line_color="yellow", opacity=0.4, annotation_text="Low BP", annotation_position="right")
-                
-                fig_bp.update_layout(
-                    template="plotly_dark",
-                    height=320,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    yaxis_title="mmHg",
-                    xaxis_title="Time",
-                    hovermode='x unified',
-                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-                    yaxis=dict(range=[50, 180])
-                )
-                st.plotly_chart(fig_bp, use_container_width=True, key=generate_unique_key("bp_chart"))
-            
-            with graph_col4:
-                st.subheader("🫁 SpO2 & Risk Score Monitor")
-                
-                # Create subplot with dual y-axes
-                fig_dual = make_subplots(specs=[[{"secondary_y": True}]])
-                
-                # SpO2 trace
-                fig_dual.add_trace(
-                    go.Scatter(
-                        x=st.session_state.history['Time'],
-                        y=st.session_state.history['SpO2'],
-                        mode='lines+markers',
-                        name='SpO2',
-                        line=dict(color='#00d4ff', width=2.5),
-                        marker=dict(size=6),
-                        hovertemplate='<b>SpO2: %{y}%</b><extra></extra>'
-                    ),
-                    secondary_y=False
-                )
-                
-                # Risk Score trace
-                risk_colors = ['#00ff88' if s <= 2 else '#ffdd00' if s <= 4 else '#ffaa00' if s <= 6 else '#ff3333' 
-                              for s in st.session_state.history['RiskScore']]
-                
-                fig_dual.add_trace(
-                    go.Scatter(
-                        x=st.session_state.history['Time'],
-                        y=st.session_state.history['RiskScore'],
-                        mode='lines+markers',
-                        name='Risk Score',
-                        line=dict(color='#ffa500', width=2),
-                        marker=dict(size=8, color=risk_colors),
-                        hovertemplate='<b>Risk: %{y}/10</b><extra></extra>'
-                    ),
-                    secondary_y=True
-                )
-                
-                # Add SpO2 critical zone
-                fig_dual.add_hrect(y0=95, y1=100, fillcolor="green", opacity=0.1, line_width=0, secondary_y=False)
-                fig_dual.add_hrect(y0=90, y1=95, fillcolor="yellow", opacity=0.05, line_width=0, secondary_y=False)
-                
-                fig_dual.update_xaxes(title_text="Time")
-                fig_dual.update_yaxes(title_text="SpO2 (%)", range=[85, 100], secondary_y=False)
-                fig_dual.update_yaxes(title_text="Risk Score", range=[0, 10], secondary_y=True)
-                
-                fig_dual.update_layout(
-                    template="plotly_dark",
-                    height=320,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    hovermode='x unified',
-                    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-                )
-                
-                st.plotly_chart(fig_dual, use_container_width=True, key=generate_unique_key("dual_chart"))
-            
-            # --- ROW 4: ADVANCED ANALYTICS ---
-            st.write("---")
-            analytics_col1, analytics_col2, analytics_col3 = st.columns([2, 2, 1])
-            
-            with analytics_col1:
-                st.subheader("📊 Multi-Vital Radar Analysis")
-                
-                if len(st.session_state.history) > 0:
-                    latest = st.session_state.history.iloc[-1]
-                    
-                    # Normalize values
-                    hr_norm = min(max((hr / 100) * 100, 0), 150)
-                    temp_norm = min(max(((temp - 95) / 8) * 100, 0), 150)
-                    bp_norm = min(max((systolic / 140) * 100, 0), 150)
-                    spo2_norm = spo2
-                    
-                    categories = ['Heart Rate', 'Temperature', 'Blood Pressure', 'SpO2']
-                    values = [hr_norm, temp_norm, bp_norm, spo2_norm]
-                    
-                    fig_radar = go.Figure()
-                    
-                    fig_radar.add_trace(go.Scatterpolar(
-                        r=values + [values[0]],
-                        theta=categories + [categories[0]],
-                        fill='toself',
-                        fillcolor='rgba(0, 212, 255, 0.3)',
-                        line=dict(color='#00d4ff', width=3),
-                        name='Current Vitals'
-                    ))
-                    
-                    # Optimal baseline
-                    optimal = [75, 50, 75, 98]
-                    fig_radar.add_trace(go.Scatterpolar(
-                        r=optimal + [optimal[0]],
-                        theta=categories + [categories[0]],
-                        line=dict(color='#00ff88', width=2, dash='dash'),
-                        name='Optimal'
-                    ))
-                    
-                    fig_radar.update_layout(
-                        template="plotly_dark",
-                        height=380,
-                        polar=dict(
-                            radialaxis=dict(
-                                visible=True, 
-                                range=[0, 150],
-                                tickvals=[0, 50, 100, 150],
-                                ticktext=['0', '50', '100', '150']
-                            )
-                        ),
-                        showlegend=True,
-                        legend=dict(orientation="h", yanchor="bottom", y=-0.15, xanchor="center", x=0.5)
-                    )
-                    st.plotly_chart(fig_radar, use_container_width=True, key=generate_unique_key("radar_chart"))
-            
-            with analytics_col2:
-                st.subheader("🤖 Latest AI Clinical Assessment")
-                
-                if st.session_state.ai_insights:
-                    latest_insight = list(st.session_state.ai_insights)[-1]
-                    insight_risk = latest_insight.get('risk_score', risk_score)
-                    
-                    urgency_badge = "🚨 CRITICAL" if "CRITICAL" in latest_insight['text'] else \
-                                   "⚠️ URGENT" if "URGENT" in latest_insight['text'] else \
-                                   "👁️ MONITOR" if "MONITOR" in latest_insight['text'] else \
-                                   "✓ ROUTINE"
-                    
-                    st.markdown(f"""
-                    <div class="ai-insight-box">
-                        <div style="display: flex; justify-content: space-between; align-items: center; margin-bottom: 10px;">
-                            <span style="color: #00d4ff; font-weight: bold; font-size: 14px;">{urgency_badge}</span>
-                            <span style="color: #888; font-size: 12px;">{latest_insight['time']}</span>
-                        </div>
-                        <p style="font-size: 14px; line-height: 1.6; margin: 10px 0;">{latest_insight['text']}</p>
-                        <div style="margin-top: 15px; padding-top: 10px; border-top: 1px solid rgba(0,212,255,0.3);">
-                            <span style="color: #00d4ff; font-size: 12px;">Computed Risk: {insight_risk}/10</span>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Show trend if available
-                    if len(st.session_state.history) >= 5:
-                        recent_risks = st.session_state.history['RiskScore'].tail(5).tolist()
-                        risk_trend = "↗️ Increasing" if recent_risks[-1] > recent_risks[0] else \
-                                    "↘️ Decreasing" if recent_risks[-1] < recent_risks[0] else \
-                                    "→ Stable"
-                        
-                        trend_color = "#ff3333" if "Increasing" in risk_trend else "#00ff88" if "Decreasing" in risk_trend else "#ffaa00"
-                        
-                        st.markdown(f"""
-                        <div class="stat-highlight">
-                            <strong>5-Reading Trend:</strong> <span style="color: {trend_color};">{risk_trend}</span>
-                        </div>
-                        """, unsafe_allow_html=True)
-                else:
-                    st.info("🔄 AI analysis initializing... First assessment in {ai_interval - time_since_last_ai} seconds")
-            
-            with analytics_col3:
-                st.subheader("📈 Session Stats")
-                
-                if len(st.session_state.history) >= 2:
-                    # Calculate changes
-                    hr_change = st.session_state.history['HR'].iloc[-1] - st.session_state.history['HR'].iloc[-2]
-                    temp_change = st.session_state.history['Temp'].iloc[-1] - st.session_state.history['Temp'].iloc[-2]
-                    bp_change = st.session_state.history['Systolic'].iloc[-1] - st.session_state.history['Systolic'].iloc[-2]
-                    
-                    st.metric("ΔHR", f"{hr_change:+.1f}", "BPM", delta_color="off")
-                    st.metric("ΔTemp", f"{temp_change:+.2f}", "°F", delta_color="off")
-                    st.metric("ΔBP", f"{bp_change:+.0f}", "mmHg", delta_color="off")
-                    
-                    # Averages
-                    st.write("**10-Min Averages:**")
-                    avg_hr = st.session_state.history['HR'].tail(10).mean()
-                    avg_temp = st.session_state.history['Temp'].tail(10).mean()
-                    avg_risk = st.session_state.history['RiskScore'].tail(10).mean()
-                    
+            st.markdown(f'<p class="vital-{hr_status}">Status: {hr_status.upper()}</p>', unsafe_allow_html=True)
+
+        with metric_cols[1]:
+            delta_temp = "Normal" if temp_status == 'normal' else "ABNORMAL"
+            st.metric(
+                "🌡️ Temperature", 
+                f"{temp} °F", 
+                delta=delta_temp,
+                delta_color="off" if temp_status == 'normal' else "inverse"
+            )
+            st.markdown(f'<p class="vital-{temp_status}">Status: {temp_status.upper()}</p>', unsafe_allow_html=True)
+
+        with metric_cols[2]:
+            bp_status = "Normal" if sys_status == 'normal' else "ABNORMAL"
+            st.metric(
+                "🩸 Blood Pressure", 
+                f"{systolic}/{diastolic}",
+                delta=bp_status,
+                delta_color="off" if sys_status == 'normal' else "inverse"
+            )
+            st.markdown(f'<p class="vital-{sys_status}">Status: {sys_status.upper()}</p>', unsafe_allow_html=True)
+
+        with metric_cols[3]:
+            delta_spo2 = "Optimal" if spo2_status == 'normal' else "LOW"
+            st.metric(
+                "🫁 SpO2", 
+                f"{spo2}%", 
+                delta=delta_spo2,
+                delta_color="off" if spo2_status == 'normal' else "inverse"
+            )
+            st.markdown(f'<p class="vital-{spo2_status}">Status: {spo2_status.upper()}</p>', unsafe_allow_html=True)
+
+        with metric_cols[4]:
+            st.markdown(f'<div class="risk-indicator" style="background-color: {risk_color};">{risk_icon} {risk_level}</div>', unsafe_allow_html=True)
+            st.metric(
+                "Risk Score",
+                f"{risk_score}/10",
+                delta=f"{len(risk_factors)} factors" if risk_factors else "No factors",
+                delta_color="inverse" if risk_score > 4 else "off"
+            )
+
+        # Risk factors display
+        if risk_factors:
+            st.markdown(f"""
+            <div class="stat-highlight">
+                <strong>Active Risk Factors:</strong> {', '.join(risk_factors)}
+            </div>
+            """, unsafe_allow_html=True)
+
+        st.write("---")
+
+        # --- ROW 2: TREND GRAPHS ---
+        # Downsampled once per sample for all viewers; only trace data is swapped in
+        with RENDER_SECONDS.time(chart="trend_refresh"):
+            charts.apply(feed.chart_series(CHART_WINDOW, CHART_POINT_BUDGET))
+
+        graph_col1, graph_col2 = st.columns(2)
+
+        with graph_col1:
+            st.subheader("📈 Heart Rate Trend Analysis")
+            render_chart(charts.hr, "hr")
+
+        with graph_col2:
+            st.subheader("🌡️ Temperature Trend Analysis")
+            render_chart(charts.temp, "temp")
+
+        # --- ROW 3: BLOOD PRESSURE & SPO2 ---
+        graph_col3, graph_col4 = st.columns(2)
+
+        with graph_col3:
+            st.subheader("🩸 Blood Pressure Dynamics")
+            render_chart(charts.bp, "bp")
+
+        with graph_col4:
+            st.subheader("🫁 SpO2 & Risk Score Monitor")
+            render_chart(charts.dual, "dual")
+
+        # --- ROW 4: ADVANCED ANALYTICS ---
+        st.write("---")
+        analytics_col1, analytics_col2, analytics_col3 = st.columns([2, 2, 1])
+
+        with analytics_col1:
+            st.subheader("📊 Multi-Vital Radar Analysis")
+
+            if snapshot.data_points > 0:
+                # Normalize values
+                hr_norm = min(max((hr / 100) * 100, 0), 150)
+                temp_norm = min(max(((temp - 95) / 8) * 100, 0), 150)
+                bp_norm = min(max((systolic / 140) * 100, 0), 150)
+                spo2_norm = spo2
+
+                charts.update_radar([hr_norm, temp_norm, bp_norm, spo2_norm])
+                render_chart(charts.radar, "radar")
+
+        with analytics_col2:
+            st.subheader("🤖 Latest AI Clinical Assessment")
+
+            if snapshot.insights:
+                # Formatted and escaped once by the ingestor (cards.py), like the sidebar cards
+                st.markdown(snapshot.insights[-1]['panel'], unsafe_allow_html=True)
+
+                # Show trend if available
+                if snapshot.risk_trend is not None:
+                    risk_direction = snapshot.risk_trend
+                    risk_trend = "↗️ Increasing" if risk_direction > 0 else \
+                                "↘️ Decreasing" if risk_direction < 0 else \
+                                "→ Stable"
+
+                    trend_color = "#ff3333" if "Increasing" in risk_trend else "#00ff88" if "Decreasing" in risk_trend else "#ffaa00"
+
                     st.markdown(f"""
                     <div class="stat-highlight">
-                        HR: {avg_hr:.1f} BPM<br>
-                        Temp: {avg_temp:.1f} °F<br>
-                        Risk: {avg_risk:.1f}/10
+                        <strong>5-Reading Trend:</strong> <span style="color: {trend_color};">{risk_trend}</span>
                     </div>
                     """, unsafe_allow_html=True)
-                    
-                    # Data quality
-                    data_points = len(st.session_state.history)
-                    st.metric("Data Points", data_points)
-                else:
-                    st.info("Collecting data...")
-        
-        time.sleep(refresh_rate)
+            else:
+                st.info("🔄 AI analysis initializing...")
+
+        with analytics_col3:
+            st.subheader("📈 Session Stats")
+
+            if snapshot.deltas is not None:
+                # Change since this patient's previous reading
+                hr_change = snapshot.deltas['HR']
+                temp_change = snapshot.deltas['Temp']
+                bp_change = snapshot.deltas['Systolic']
+
+                st.metric("ΔHR", f"{hr_change:+.1f}", "BPM", delta_color="off")
+                st.metric("ΔTemp", f"{temp_change:+.2f}", "°F", delta_color="off")
+                st.metric("ΔBP", f"{bp_change:+.0f}", "mmHg", delta_color="off")
+
+                # Averages
+                st.write("**10-Min Averages:**")
+                window = snapshot.averages
+                avg_hr = window['HR']['mean']
+                avg_temp = window['Temp']['mean']
+                avg_risk = window['RiskScore']['mean']
+
+                st.markdown(f"""
+                <div class="stat-highlight">
+                    HR: {avg_hr:.1f} BPM<br>
+                    Temp: {avg_temp:.1f} °F<br>
+                    Risk: {avg_risk:.1f}/10
+                </div>
+                """, unsafe_allow_html=True)
+
+                # Data quality
+                data_points = snapshot.data_points
+                st.metric("Data Points", data_points)
+            else:
+                st.info("Collecting data...")
         
-    except requests.exceptions.Timeout:
-        with placeholder.container():
-            st.error("🔌 Connection Timeout: Sensor not responding")
-            st.info("Retrying in 3 seconds...")
-            st.caption("Check network connection and sensor status")
-        time.sleep(3)
+    except requests.exceptions.Timeout as e:
+        LOOP_ERRORS.inc(exception=type(e).__name__)
+        st.error("🔌 Connection Timeout: Sensor not responding")
+        st.info(f"Retrying in {refresh_rate} seconds...")
+        st.caption("Check network connection and sensor status")
         
-    except requests.exceptions.ConnectionError:
-        with placeholder.container():
-            st.error("🔌 Connection Error: Unable to reach remote sensor")
-            st.info("Attempting to reconnect...")
-            st.caption(f"Target: {NGROK_URL}")
-        time.sleep(3)
+    except requests.exceptions.ConnectionError as e:
+        LOOP_ERRORS.inc(exception=type(e).__name__)
+        st.error("🔌 Connection Error: Unable to reach remote sensor")
+        st.info("Attempting to reconnect...")
+        st.caption(f"Target: {STREAM_URL}")
         
     except requests.exceptions.RequestException as e:
-        with placeholder.container():
-            st.error(f"🔌 Network Error: {type(e).__name__}")
-            st.info("Attempting to reconnect...")
-            st.caption(f"Details: {str(e)}")
-        time.sleep(3)
+        LOOP_ERRORS.inc(exception=type(e).__name__)
+        st.error(f"🔌 Network Error: {type(e).__name__}")
+        st.info("Attempting to reconnect...")
+        st.caption(f"Details: {str(e)}")
         
     except KeyError as e:
-        with placeholder.container():
-            st.error(f"📊 Data Format Error: Missing field {str(e)}")
-            st.info("Sensor may be sending incomplete data")
-        time.sleep(2)
+        LOOP_ERRORS.inc(exception=type(e).__name__)
+        st.error(f"📊 Data Format Error: Missing field {str(e)}")
+        st.info("Sensor may be sending incomplete data")
         
     except Exception as e:
-        with placeholder.container():
-            st.error(f"⚠️ System Error: {type(e).__name__}")
-            st.warning(f"Details: {str(e)}")
-            st.info("Dashboard will retry in 2 seconds...")
-            if st.button("Force Reset", key=f"force_reset_{int(time.time())}"):
-                st.rerun()
-        time.sleep(2)
\ No newline at end of file
+        LOOP_ERRORS.inc(exception=type(e).__name__)
+        st.error(f"⚠️ System Error: {type(e).__name__}")
+        st.warning(f"Details: {str(e)}")
+        st.info(f"Dashboard will retry in {refresh_rate} seconds...")
+        if st.button("Force Reset", key="force_reset"):
+            st.rerun(scope="app")
+
+if selected_patient is None:
+    render_ward()
+else:
+    render_bed()
@@ -1,56 +1,234 @@
-import requests
-import json
-import time
+import argparse
 import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from http_client import PooledClient
+from vitals_loader import iter_records, select_patients, in_time_order, record_time
 
-# 1. Verify File Exists
+# 1. Replay source
+# .json (array), .ndjson/.jsonl or .csv; records are streamed, never loaded whole
 FILE_PATH = r"C:\Users\Prajwal\Downloads\patient_data.json"
-if not os.path.exists(FILE_PATH):
-    print(f"CRITICAL ERROR: The file was not found at {FILE_PATH}")
-    exit()
+# Beds to replay concurrently; None replays every patient in the file.
+# Note: patient ids are compared as strings, so "1" and 1 both match
+PATIENT_IDS = ["1"]
+# Set True when the file is already in timestamp order: records are then sent
+# as they are parsed. False sorts the selected records in memory first.
+PRESORTED = False
 
-# 2. Load Data
-print("Loading JSON data...")
-with open(FILE_PATH, 'r') as f:
-    all_records = json.load(f)
-print(f"Total records found in file: {len(all_records)}")
+# 2. Clock
+# Pacing follows the records' own timestamp deltas divided by SPEED:
+# 1 = real time, 10 = ten times faster, None = as fast as the backend accepts
+SPEED = 1.0
+REPORT_INTERVAL = 10  # seconds between progress lines
 
-# 3. Filter for Patient 1
-# Note: Check if patient_id in your JSON is a string "1" or integer 1
-patient_1_records = [r for r in all_records if str(r.get("patient_id")) == "1"]
-print(f"Filtered records for Patient 1: {len(patient_1_records)}")
+# 3. Sending
+API_URL = "https://vitalguard-ai.onrender.com/update"
+BATCH_API_URL = "https://vitalguard-ai.onrender.com/update/batch"
 
-if len(patient_1_records) == 0:
-    print("ERROR: No records found for Patient ID 1. Check the ID in your JSON file.")
-    exit()
+# Batch mode: send up to BATCH_SIZE records per request, or whatever has
+# accumulated after BATCH_INTERVAL_MS. BATCH_SIZE = 1 keeps one POST per record.
+BATCH_SIZE = 1
+BATCH_INTERVAL_MS = 5000
 
-# 4. Sorting
-patient_1_records.sort(key=lambda x: x["timestamp"])
+# Sends run on a worker pool, so a slow POST never delays the next record.
+# One keep-alive session is shared by all workers: the TLS handshake is paid
+# once per connection instead of once per record.
+SEND_WORKERS = 8
+MAX_IN_FLIGHT = 64  # requests queued or running before the scheduler waits
+RETRIES = 3
+LOG_EACH_SEND = False
 
-# 5. The Stream Loop
-API_URL = "https://vitalguard-ai.onrender.com/update"
-print("Starting live data stream...")
-
-for record in patient_1_records:
-    try:
-        # Convert types to ensure FastAPI accepts them
-        payload = {
-            "patient_id": int(record["patient_id"]),
-            "timestamp": str(record["timestamp"]),
-            "heart_rate": float(record["heart_rate"]),
-            "body_temperature": float(record["body_temperature"]),
-            "systolic_bp": float(record["systolic_bp"]),
-            "diastolic_bp": float(record["diastolic_bp"])
-        }
-        
-        response = requests.post(API_URL, json=payload, timeout=10)
-        
-        if response.status_code == 200:
-            print(f"SENT: Time={payload['timestamp']} | HR={payload['heart_rate']}")
-        else:
-            print(f"SERVER ERROR: {response.status_code} - {response.text}")
-            
-    except Exception as e:
-        print(f"CONNECTION ERROR: {e}")
-    
-    time.sleep(1)
\ No newline at end of file
+def to_payload(record):
+    # Convert types to ensure FastAPI accepts them
+    return {
+        "patient_id": int(record["patient_id"]),
+        "timestamp": str(record["timestamp"]),
+        "heart_rate": float(record["heart_rate"]),
+        "body_temperature": float(record["body_temperature"]),
+        "systolic_bp": float(record["systolic_bp"]),
+        "diastolic_bp": float(record["diastolic_bp"])
+    }
+
+class ReplayEngine:
+    """Replays records for many beds at once, paced by their timestamps.
+
+    A single scheduler thread walks the records in time order and sleeps until
+    each one is due (record time delta / speed); sends are handed to worker
+    lanes, so request latency never stretches the replay clock. Each bed is
+    pinned to one single-threaded lane, so its samples reach the backend in
+    record order (trend scoring and history range reads depend on it). Lag is
+    how late a record was handed off relative to its due time.
+    """
+
+    def __init__(self, client, speed=SPEED, batch_size=BATCH_SIZE, batch_interval_ms=BATCH_INTERVAL_MS,
+                 workers=SEND_WORKERS, max_in_flight=MAX_IN_FLIGHT, report_interval=REPORT_INTERVAL):
+        self.client = client
+        self.speed = speed
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval_ms / 1000
+        self.report_interval = report_interval
+        self._lanes = [ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"replay-{i}") for i in range(workers)]
+        self._lane_of = {}  # patient_id -> lane index, assigned round-robin on first sight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.records = 0
+        self.sent = 0
+        self.failed = 0
+        self.patients = set()
+        self.lags = deque(maxlen=10000)  # recent hand-off lags (s), bounded for huge replays
+        self.first_time = self.last_time = None
+
+    def run(self, records):
+        start = time.monotonic()
+        next_report = start + self.report_interval
+        pending = []
+        batch_started = start
+        for record in records:
+            try:
+                payload = to_payload(record)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"SKIPPED RECORD: {e}")
+                continue
+            ts = record_time(record.get("timestamp"))
+            if ts is not None:
+                if self.first_time is None:
+                    self.first_time = ts
+                self.last_time = ts if self.last_time is None else max(self.last_time, ts)
+                if self.speed:
+                    due = start + (ts - self.first_time) / self.speed
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    self.lags.append(max(time.monotonic() - due, 0.0))
+            self.records += 1
+            self.patients.add(payload["patient_id"])
+
+            if self.batch_size > 1:
+                if not pending:
+                    batch_started = time.monotonic()
+                pending.append(payload)
+                if len(pending) >= self.batch_size or time.monotonic() - batch_started >= self.batch_interval:
+                    self._submit_batch(pending)
+                    pending = []
+            else:
+                self._submit(self._send_one, payload, self._lane(payload["patient_id"]))
+
+            now = time.monotonic()
+            if now >= next_report:
+                self.report(now - start)
+                next_report = now + self.report_interval
+        if pending:
+            self._submit_batch(pending)
+        for lane in self._lanes:
+            lane.shutdown(wait=True)
+        return time.monotonic() - start
+
+    def _lane(self, patient_id):
+        lane = self._lane_of.get(patient_id)
+        if lane is None:
+            lane = self._lane_of[patient_id] = len(self._lane_of) % len(self._lanes)
+        return lane
+
+    def _submit_batch(self, payloads):
+        """Split a batch by lane, keeping record order within each part"""
+        parts = {}
+        for payload in payloads:
+            parts.setdefault(self._lane(payload["patient_id"]), []).append(payload)
+        for lane, part in parts.items():
+            self._submit(self._send_batch, part, lane)
+
+    def _submit(self, send, payload, lane):
+        # Backpressure: at max speed, wait for a free slot instead of queueing the whole file
+        self._slots.acquire()
+        future = self._lanes[lane].submit(send, payload)
+        future.add_done_callback(lambda _: self._slots.release())
+
+    def _record_result(self, count, ok):
+        with self._lock:
+            if ok:
+                self.sent += count
+            else:
+                self.failed += count
+
+    def _send_one(self, payload):
+        try:
+            response = self.client.post(API_URL, json=payload, timeout=10)
+            ok = response.status_code == 200
+            if not ok:
+                print(f"SERVER ERROR: {response.status_code} - {response.text}")
+            elif LOG_EACH_SEND:
+                print(f"SENT: Patient={payload['patient_id']} | Time={payload['timestamp']} | HR={payload['heart_rate']}")
+        except Exception as e:
+            ok = False
+            print(f"CONNECTION ERROR: {e}")
+        self._record_result(1, ok)
+
+    def _send_batch(self, payloads):
+        try:
+            response = self.client.post(BATCH_API_URL, json=payloads, timeout=10)
+            ok = response.status_code == 200
+            if not ok:
+                print(f"SERVER ERROR: {response.status_code} - {response.text}")
+            elif LOG_EACH_SEND:
+                print(f"SENT BATCH: {len(payloads)} records | Last Time={payloads[-1]['timestamp']}")
+        except Exception as e:
+            ok = False
+            print(f"CONNECTION ERROR: {e}")
+        self._record_result(len(payloads), ok)
+
+    def target_rate(self):
+        """Records per second the replay clock asks for (None at max speed)"""
+        if not self.speed or self.first_time is None or self.last_time == self.first_time:
+            return None
+        return self.records / ((self.last_time - self.first_time) / self.speed)
+
+    def report(self, elapsed):
+        achieved = self.sent / elapsed if elapsed > 0 else 0.0
+        target = self.target_rate()
+        target_text = f"{target:.1f}/s" if target is not None else "max"
+        lag_text = ""
+        if self.lags:
+            lag_text = f" | lag p95={np.percentile(self.lags, 95) * 1000:.0f} ms"
+        print(f"REPLAY: {self.records} records, {len(self.patients)} patients | sent={self.sent} failed={self.failed} "
+              f"| achieved {achieved:.1f}/s vs target {target_text}{lag_text}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded vitals to the backend")
+    parser.add_argument("file", nargs="?", default=FILE_PATH)
+    parser.add_argument("--patients", nargs="*", default=PATIENT_IDS,
+                        help="patient ids to replay (no values = every patient)")
+    parser.add_argument("--speed", default=SPEED, type=lambda v: None if v == "max" else float(v),
+                        help="1 = real time, 10 = 10x, max = no pacing")
+    parser.add_argument("--presorted", action="store_true", default=PRESORTED)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=SEND_WORKERS)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file):
+        print(f"CRITICAL ERROR: The file was not found at {args.file}")
+        return
+
+    patient_ids = args.patients or None
+    who = "all patients" if patient_ids is None else f"patients {', '.join(patient_ids)}"
+    print(f"Streaming records for {who} from {args.file}...")
+    records = in_time_order(select_patients(iter_records(args.file), patient_ids), presorted=args.presorted)
+
+    client = PooledClient(pool_size=args.workers, retries=RETRIES)
+    engine = ReplayEngine(client, speed=args.speed, batch_size=args.batch_size, workers=args.workers)
+    print("Starting live data stream...")
+    elapsed = engine.run(records)
+    if engine.records == 0:
+        print(f"ERROR: No records found for {who}. Check the IDs in your file.")
+    engine.report(elapsed)
+
+    stats = client.timing_summary()
+    print(f"DONE: {stats['count']} requests | p50={stats['p50_ms']} ms | p95={stats['p95_ms']} ms | failed={stats['failed']}")
+    client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# --- POOLED HTTP CLIENT (shared by dashboard.py and demo.py) ---
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5  # seconds; urllib3 doubles it per retry
+DEFAULT_TIMEOUT = 10
+RETRY_STATUSES = (502, 503, 504)  # Render returns these while the service wakes up
+
+RequestTiming = namedtuple("RequestTiming", ["method", "url", "status", "seconds"])
+
+class PooledClient:
+    """Keep-alive requests.Session with a sized pool, retry/backoff and request timings.
+
+    Connection errors are retried for every method (nothing reached the server),
+    while read errors and 5xx responses are only retried for GET so a POSTed
+    sample is never stored twice.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, retries=DEFAULT_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT, timing_window=500):
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = timeout
+        self.timings = deque(maxlen=timing_window)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        status = None
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+            status = response.status_code
+            return response
+        finally:
+            # With stream=True this is time-to-headers, not the whole body
+            self.timings.append(RequestTiming(method, url, status, time.perf_counter() - start))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def timing_summary(self):
+        """Count, failures and p50/p95/max latency (ms) over the recent window"""
+        timings = list(self.timings)
+        if not timings:
+            return {"count": 0, "failed": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        ms = np.array([t.seconds for t in timings]) * 1000
+        return {
+            "count": len(timings),
+            "failed": sum(1 for t in timings if t.status is None or t.status >= 400),
+            "p50_ms": round(float(np.percentile(ms, 50)), 1),
+            "p95_ms": round(float(np.percentile(ms, 95)), 1),
+            "max_ms": round(float(ms.max()), 1),
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,316 @@
+import json
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+import requests
+
+from ai_insights import InsightWorker, get_vital_trends
+from alert_engine import Severity
+from cards import AlertCards, insight_block, prepare_insight
+from charts import chart_series, CHART_POINT_BUDGET
+from metrics import REGISTRY
+from tick_pipeline import TickPipeline
+from vitals_history import DEFAULT_CAPACITY
+from ward import WardState, ward_grid_html, WARD_COLUMNS
+
+# --- SHARED INGESTOR (one per Streamlit process; sessions only render) ---
+# A single SSE connection feeds every bed. The ward grid state is kept for all
+# beds; full history, scoring, alerts and Gemini insights are kept only for
+# beds some session is viewing in detail, and computed once however many
+# sessions watch them.
+AI_INTERVAL = 30  # seconds between insights per bed, unless a new critical alert forces one
+AVERAGE_WINDOW = 600  # seconds averaged in each snapshot's "10-Min Averages"
+INSIGHT_HISTORY = 20
+ALERT_DISPLAY_LIMIT = 10  # newest alert records per severity in each snapshot
+FEED_IDLE_SECONDS = 600  # a bed no session has read for this long stops being tracked in detail
+IDLE_WAIT = 1.0  # seconds to block on the stream before servicing insights and idle feeds
+WARD_SEED_TIMEOUT = 5
+STREAM_BACKLOG = 10000  # pushed samples queued for the ingestor; past this the oldest are dropped
+
+FETCH_SECONDS = REGISTRY.histogram("vitalguard_dashboard_fetch_seconds", "Stream request time until response headers")
+WARD_FETCH_SECONDS = REGISTRY.histogram("vitalguard_dashboard_ward_fetch_seconds", "One /latest?all=true request for the ward grid")
+INGESTOR_ERRORS = REGISTRY.counter("vitalguard_dashboard_ingestor_errors", "Errors caught by the shared ingestor loop", ["exception"])
+STREAM_DROPPED = REGISTRY.counter("vitalguard_dashboard_stream_dropped", "Pushed samples dropped because the ingestor fell behind")
+TRACKED_BEDS = REGISTRY.gauge("vitalguard_dashboard_tracked_beds", "Beds the shared ingestor keeps full history for")
+
+class VitalsStreamReader(threading.Thread):
+    """Background SSE consumer that queues every pushed sample for the render loop"""
+
+    def __init__(self, url, client, patient_id=None, reconnect_delay=3, backlog=STREAM_BACKLOG):
+        super().__init__(daemon=True)
+        self.url = url
+        self.client = client
+        self.patient_id = patient_id
+        self.params = {"patient_id": patient_id} if patient_id else {}
+        self.reconnect_delay = reconnect_delay
+        self.samples = queue.Queue(maxsize=backlog)
+        self.connected = False
+        self.last_error = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                # Read timeout > server keep-alive interval, so a dead stream is noticed
+                start = time.perf_counter()
+                with self.client.get(self.url, params=self.params, stream=True, timeout=(5, 30)) as response:
+                    FETCH_SECONDS.observe(time.perf_counter() - start)
+                    response.raise_for_status()
+                    self.connected = True
+                    self.last_error = None
+                    for line in response.iter_lines(decode_unicode=True):
+                        if self._stop_event.is_set():
+                            return
+                        if line and line.startswith("data:"):
+                            self._enqueue(json.loads(line[5:]))
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.last_error = e
+            self.connected = False
+            self._stop_event.wait(self.reconnect_delay)
+
+    def _enqueue(self, sample):
+        # Ingestor behind: drop the oldest sample rather than grow without bound (as the backend's /stream does)
+        while True:
+            try:
+                self.samples.put_nowait(sample)
+                return
+            except queue.Full:
+                try:
+                    self.samples.get_nowait()
+                    STREAM_DROPPED.inc()
+                except queue.Empty:
+                    pass
+
+    def stop(self):
+        self._stop_event.set()
+
+    def next_sample(self, timeout):
+        """Next pushed sample, None if nothing arrived, or re-raise the stream's error"""
+        try:
+            return self.samples.get(timeout=timeout)
+        except queue.Empty:
+            if not self.connected and self.last_error is not None:
+                raise self.last_error
+            return None
+
+    def caught_up(self):
+        return self.samples.empty()
+
+# What a session needs to draw one bed, frozen after each sample or insight
+FeedSnapshot = namedtuple("FeedSnapshot", [
+    "version", "tick",
+    "alerts",      # alert_engine.AlertSnapshot: newest records overall and per severity, counts
+    "alert_html",  # sidebar filter name -> precomputed card block (cards.py)
+    "insights",    # prepared insight dicts, oldest first
+    "insight_html",
+    "risk_trend",  # -1/0/1 once the RiskScore window is full, else None
+    "deltas",      # change since the previous reading per vital, or None before two readings
+    "averages",    # rollup window_stats over the last average_window seconds
+    "data_points",
+])
+
+class PatientFeed:
+    """Shared detailed state for one bed: written by the ingestor, read by sessions"""
+
+    def __init__(self, patient_id, history_capacity=DEFAULT_CAPACITY, average_window=AVERAGE_WINDOW):
+        self.patient_id = patient_id
+        self.pipeline = TickPipeline(history_capacity)
+        self.insights = deque(maxlen=INSIGHT_HISTORY)
+        self.cards = AlertCards()
+        self.average_window = average_window
+        self.last_ai_call = None
+        self.last_read = time.monotonic()
+        self.version = 0
+        self.snapshot = None
+        self._changed = threading.Condition()
+        self._charts = (None, None)  # (version, window, budget) -> chart_series()
+
+    def process(self, data, now):
+        """Ingestor thread: run one sample through the pipeline and publish it"""
+        with self._changed:
+            tick = self.pipeline.process(data, now)
+            self._publish(tick)
+        return tick
+
+    def add_insights(self, insights):
+        with self._changed:
+            self.insights.extend(prepare_insight(insight) for insight in insights)
+            # Before the bed's first sample there is nothing to publish; the first snapshot carries them
+            if self.snapshot is not None:
+                self._publish(self.snapshot.tick, alerts_changed=False)
+
+    def _publish(self, tick, alerts_changed=True):
+        stats = tick.stats
+        deltas = None
+        if len(stats['HR']) >= 2:
+            deltas = {name: stats[name].delta for name in ('HR', 'Temp', 'Systolic')}
+        if alerts_changed:
+            alerts = self.pipeline.alerts.snapshot(ALERT_DISPLAY_LIMIT)
+            alert_html = self.cards.blocks(alerts)
+        else:
+            alerts, alert_html = self.snapshot.alerts, self.snapshot.alert_html
+        self.version += 1
+        self.snapshot = FeedSnapshot(
+            version=self.version,
+            tick=tick,
+            alerts=alerts,
+            alert_html=alert_html,
+            insights=tuple(self.insights),
+            insight_html=insight_block(self.insights),
+            risk_trend=stats.trend('RiskScore') if stats['RiskScore'].full() else None,
+            deltas=deltas,
+            averages=self.pipeline.rollups.window_stats(self.average_window, tick.sample.now.timestamp()),
+            data_points=len(self.pipeline.history),
+        )
+        self._changed.notify_all()
+
+    def wait(self, version, timeout):
+        """Snapshot newer than `version`, waiting up to `timeout` seconds; else None"""
+        with self._changed:
+            self.last_read = time.monotonic()
+            if self.version <= version:
+                self._changed.wait(timeout)
+            return self.snapshot if self.version > version else None
+
+    def chart_series(self, window, budget=CHART_POINT_BUDGET):
+        """Downsampled trend data for the current version, computed once for all sessions"""
+        with self._changed:
+            key = (self.version, window, budget)
+            if self._charts[0] != key:
+                self._charts = (key, chart_series(self.pipeline.history.tail(window), budget))
+            return self._charts[1]
+
+class VitalsIngestor(threading.Thread):
+    """Consumes the backend stream once per process and keeps ward and per-bed state.
+
+    Sessions call subscribe(patient_id) to have a bed tracked in detail and then
+    only read: PatientFeed.wait() for snapshots, ward_view() for the grid.
+    """
+
+    def __init__(self, stream_url, latest_url, client, insight_worker=None, history_capacity=DEFAULT_CAPACITY,
+                 ai_interval=AI_INTERVAL, average_window=AVERAGE_WINDOW):
+        super().__init__(daemon=True)
+        self.latest_url = latest_url
+        self.client = client
+        self.reader = VitalsStreamReader(stream_url, client)
+        self.insight_worker = insight_worker if insight_worker is not None else InsightWorker()
+        self.history_capacity = history_capacity
+        self.ai_interval = ai_interval
+        self.average_window = average_window
+        self.ward = WardState()
+        self.feeds = {}
+        self._ward_lock = threading.Lock()
+        self._feeds_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    # Session side
+    def subscribe(self, patient_id):
+        """The bed's shared feed, created (and tracked from now on) if needed"""
+        with self._feeds_lock:
+            feed = self.feeds.get(patient_id)
+            if feed is None:
+                feed = self.feeds[patient_id] = PatientFeed(patient_id, self.history_capacity, self.average_window)
+                TRACKED_BEDS.set(len(self.feeds))
+            feed.last_read = time.monotonic()
+            return feed
+
+    def patient_ids(self):
+        with self._ward_lock:
+            return self.ward.patient_ids()
+
+    def ward_view(self, now, columns=WARD_COLUMNS):
+        """(counts per risk level, grid HTML, bed count) for the ward overview"""
+        with self._ward_lock:
+            return self.ward.counts(now), ward_grid_html(self.ward, now, columns), len(self.ward)
+
+    def raise_stream_error(self):
+        """Re-raise the stream's error while it is disconnected, for the session's error panels"""
+        if not self.reader.connected and self.reader.last_error is not None:
+            raise self.reader.last_error
+
+    # Ingestor thread
+    def run(self):
+        self._seed_ward()
+        self.reader.start()
+        while not self._stop_event.is_set():
+            try:
+                self._step()
+            except Exception as e:
+                # Every session depends on this thread: skip the bad sample or insight, never die
+                INGESTOR_ERRORS.inc(exception=type(e).__name__)
+
+    def _step(self):
+        try:
+            data = self.reader.next_sample(timeout=IDLE_WAIT)
+        except (requests.exceptions.RequestException, ValueError):
+            data = None  # the reader reconnects on its own; sessions show its error
+            self._stop_event.wait(IDLE_WAIT)
+        if data is not None:
+            self._ingest(data, datetime.now())
+        self._collect_insights()
+        self._drop_idle_feeds()
+
+    def stop(self):
+        self._stop_event.set()
+        self.reader.stop()
+
+    def _seed_ward(self):
+        """Show every known bed right away, before each one next reports"""
+        try:
+            start = time.perf_counter()
+            response = self.client.get(self.latest_url, params={"all": "true"}, timeout=WARD_SEED_TIMEOUT)
+            WARD_FETCH_SECONDS.observe(time.perf_counter() - start)
+            response.raise_for_status()
+            latest = response.json()
+        except (requests.exceptions.RequestException, ValueError):
+            return
+        with self._ward_lock:
+            self.ward.update(latest, datetime.now())
+
+    def _ingest(self, data, now):
+        patient_id = str(data.get('patient_id', 'default'))
+        with self._ward_lock:
+            self.ward.update({patient_id: data}, now, dedupe=False)
+        feed = self.feeds.get(patient_id)
+        if feed is None:
+            return
+        tick = feed.process(data, now)
+        self._maybe_request_insight(feed, tick, now)
+
+    def _maybe_request_insight(self, feed, tick, now):
+        due = feed.last_ai_call is None or (now - feed.last_ai_call).total_seconds() >= self.ai_interval
+        # Force AI generation if a critical alert opened or escalated
+        if not due and not any(record.severity == Severity.CRITICAL for record in tick.new_alerts):
+            return
+        sample, assessment = tick.sample, tick.assessment
+        vitals_summary = {
+            'heart_rate': sample.hr,
+            'temperature': sample.temp,
+            'blood_pressure': f"{sample.systolic}/{sample.diastolic}",
+            'spo2': sample.spo2,
+            'risk_score': assessment.risk
+        }
+        # Runs in the background; a trigger during an in-flight call is merged into the next one
+        self.insight_worker.submit(
+            feed.patient_id, vitals_summary, get_vital_trends(tick.stats), feed.pipeline.alert_context, sample.time_str
+        )
+        feed.last_ai_call = now
+
+    def _collect_insights(self):
+        for patient_id, feed in list(self.feeds.items()):
+            insights = self.insight_worker.collect(patient_id)
+            if insights:
+                feed.add_insights(insights)
+
+    def _drop_idle_feeds(self):
+        cutoff = time.monotonic() - FEED_IDLE_SECONDS
+        with self._feeds_lock:
+            idle = [pid for pid, feed in self.feeds.items() if feed.last_read < cutoff]
+            for patient_id in idle:
+                del self.feeds[patient_id]
+                self.insight_worker.discard(patient_id)
+            if idle:
+                TRACKED_BEDS.set(len(self.feeds))
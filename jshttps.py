@@ -1,21 +1,405 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+import json
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
-app = FastAPI()
+from metrics import REGISTRY, CONTENT_TYPE, TOKEN_HEADER, render, validate_families
+from risk_engine import TREND_WINDOW, get_threshold_table, sample_vitals, score_sample
+from vitals_archive import ARCHIVE_DIR, VitalsArchive
+
+@asynccontextmanager
+async def lifespan(app):
+    global archive
+    # Opened here, not at import, so importers (tests, bench_ingest.py) can point it elsewhere first
+    archive = VitalsArchive(HISTORY_COLUMNS, root=ARCHIVE_ROOT, legacy_columns=LEGACY_ARCHIVE_COLUMNS)
+    restore_from_archive()
+    yield
+    archive.close()
+
+app = FastAPI(lifespan=lifespan)
 # --- ADD THIS SECTION ---
 @app.get("/")
 def read_root():
     return {"status": "Online", "message": "VitalGuard Backend is Running"}
 # ------------------------
-current_data = {}
+
+# --- PER-PATIENT STORE ---
+# Latest sample per bed, keyed by patient_id. Each update is a single dict item
+# assignment, so writers for different beds never rebind a shared global.
+DEFAULT_PATIENT_ID = "default"
+latest_by_patient = {}
+
+def patient_key(data):
+    """Normalize patient ids so 1, "1" and /latest/1 all hit the same bed"""
+    return str(data.get("patient_id", DEFAULT_PATIENT_ID))
+
+# --- PER-PATIENT HISTORY ---
+HISTORY_COLUMNS = ("timestamp", "heart_rate", "body_temperature", "systolic_bp", "diastolic_bp", "spo2", "risk_score")
+HISTORY_CAPACITY = 3600  # 1 h at 1 Hz -> 7 x 3600 float64 = ~200 KB per bed
+# Layout of archives written before risk_score (and the archive's layout file)
+LEGACY_ARCHIVE_COLUMNS = HISTORY_COLUMNS[:6]
+
+TIMESTAMP_RANGE = (0, 253402300799)  # epoch seconds, 1970-01-01 .. 9999-12-31
+
+def _epoch_in_range(seconds):
+    return math.isfinite(seconds) and TIMESTAMP_RANGE[0] <= seconds <= TIMESTAMP_RANGE[1]
+
+def parse_timestamp(value, default=None):
+    """Convert epoch seconds or an ISO-8601 string to epoch seconds (default if invalid or out of range)"""
+    if value is None or value == "":
+        return default
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        try:
+            seconds = datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return default
+    return seconds if _epoch_in_range(seconds) else default
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+class VitalsRingBuffer:
+    """Fixed-capacity columnar history for one bed.
+
+    Columns live in one preallocated (n_columns, capacity) float64 array, so
+    memory per bed is constant and a range read is a slice copy per segment.
+    Samples are expected in arrival order (non-decreasing timestamps).
+    """
+
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        self.capacity = capacity
+        self._data = np.full((len(HISTORY_COLUMNS), capacity), np.nan)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, row):
+        self._data[:, self._next] = row
+        self._next = (self._next + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def extend(self, rows):
+        """Append an (n, n_columns) block in one vectorized write"""
+        rows = np.asarray(rows, dtype=float)[-self.capacity:]
+        n = len(rows)
+        if n == 0:
+            return
+        idx = (self._next + np.arange(n)) % self.capacity
+        self._data[:, idx] = rows.T
+        self._next = (self._next + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def _segments(self):
+        """Physical slices holding the rows, oldest first"""
+        if self._size < self.capacity:
+            return [slice(0, self._size)]
+        return [slice(self._next, self.capacity), slice(0, self._next)]
+
+    def range(self, since=None, limit=None):
+        """Newest `limit` rows with timestamp >= since, as one (n_columns, n) copy"""
+        parts = []
+        for seg in self._segments():
+            block = self._data[:, seg]
+            if since is not None:
+                block = block[:, np.searchsorted(block[0], since, side="left"):]
+            parts.append(block)
+        rows = np.concatenate(parts, axis=1) if len(parts) > 1 else parts[0].copy()
+        if limit is not None and limit < rows.shape[1]:
+            rows = rows[:, rows.shape[1] - limit:]
+        return rows
+
+history_by_patient = {}
+
+def get_history_buffer(key):
+    buffer = history_by_patient.get(key)
+    if buffer is None:
+        buffer = history_by_patient[key] = VitalsRingBuffer()
+    return buffer
+
+def history_row(data, received_at):
+    ts = parse_timestamp(data.get("timestamp"), default=received_at)
+    return [ts] + [_as_float(data.get(col)) for col in HISTORY_COLUMNS[1:]]
+
+# --- INGEST SCORING ---
+# Every sample is scored once, here, against the bed's previous TREND_WINDOW
+# scores. The enriched record (risk_engine.SCORE_FIELDS) is what gets stored,
+# archived and streamed, so dashboards and offline readers never re-score.
+recent_risks_by_patient = {}
+
+def check_vitals(key, data):
+    try:
+        sample_vitals(data)
+    except (TypeError, ValueError, OverflowError):
+        raise HTTPException(status_code=422, detail=f"Missing heart rate, or non-numeric or non-finite vitals, for patient {key}")
+    # A numeric timestamp must be a usable epoch: NaN would be served back by /latest (invalid JSON)
+    # and would break the sorted-timestamp searches; other strings fall back to the receive time
+    try:
+        seconds = float(data.get("timestamp"))
+    except (TypeError, ValueError):
+        return
+    if not _epoch_in_range(seconds):
+        raise HTTPException(status_code=422, detail=f"Timestamp out of range for patient {key}")
+
+def score_ingest(key, data):
+    """Enriched copy of a validated sample; advances the bed's trend window"""
+    recent = recent_risks_by_patient.get(key)
+    if recent is None:
+        recent = recent_risks_by_patient[key] = deque(maxlen=TREND_WINDOW)
+    scored = score_sample(data, recent, get_threshold_table(key))
+    recent.append(scored["risk_score"])
+    return scored
+
+# --- PERSISTENT ARCHIVE ---
+# Every sample is also appended to hourly on-disk segments; on startup the ring
+# buffers are refilled with each bed's last ARCHIVE_RESTORE_HOURS of samples.
+ARCHIVE_RESTORE_HOURS = 1
+ARCHIVE_ROOT = os.environ.get("VITALGUARD_ARCHIVE_DIR", ARCHIVE_DIR)
+archive = None  # VitalsArchive, opened by lifespan()
+
+def restore_from_archive(hours=ARCHIVE_RESTORE_HOURS):
+    """Refill history, trend windows and latest (if empty) for every archived bed.
+
+    The window ends at each bed's newest record, not at the wall clock: records
+    are filed under the sample's own timestamp, which is historical for replays.
+    """
+    risk_column = HISTORY_COLUMNS.index("risk_score")
+    for key in archive.patients():
+        newest = archive.last_timestamp(key)
+        if newest is None:
+            continue
+        rows = archive.range(key, since=newest - hours * 3600)
+        if rows.shape[1] == 0:
+            continue
+        get_history_buffer(key).extend(rows.T)
+        risks = rows[risk_column, -TREND_WINDOW - 1:-1]
+        recent_risks_by_patient[key] = deque((int(r) for r in risks if not np.isnan(r)), maxlen=TREND_WINDOW)
+        last = rows[:, -1]
+        if key not in latest_by_patient:
+            sample = {"patient_id": key}
+            sample.update({name: None if np.isnan(v) else float(v) for name, v in zip(HISTORY_COLUMNS, last)})
+            # Rescoring the newest row against the scores before it restores its factors and statuses
+            try:
+                set_latest(key, score_ingest(key, sample))
+            except (TypeError, ValueError):
+                pass  # e.g. a legacy row without a heart rate: history is back, latest waits for the next sample
+        elif not np.isnan(last[risk_column]):
+            recent_risks_by_patient[key].append(int(last[risk_column]))
+
+def history_payload(patient_id, rows):
+    """Column-oriented JSON body for an (n_columns, n) block of rows"""
+    columns = {}
+    for name, values in zip(HISTORY_COLUMNS, rows):
+        missing = np.isnan(values)
+        if missing.any():
+            # JSON has no NaN; report absent readings as null
+            values = values.astype(object)
+            values[missing] = None
+        columns[name] = values.tolist()
+    return {"patient_id": patient_id, "count": rows.shape[1], "columns": columns}
+
+def parse_range_args(since, limit, until=None):
+    since_ts = parse_timestamp(since)
+    if since is not None and since_ts is None:
+        raise HTTPException(status_code=422, detail=f"Invalid since value: {since}")
+    until_ts = parse_timestamp(until)
+    if until is not None and until_ts is None:
+        raise HTTPException(status_code=422, detail=f"Invalid until value: {until}")
+    if limit is not None and limit < 0:
+        raise HTTPException(status_code=422, detail="limit must be >= 0")
+    return since_ts, until_ts
+
+def set_latest(key, data):
+    # Pop + re-insert keeps the most recently updated bed last in the dict (O(1))
+    latest_by_patient.pop(key, None)
+    latest_by_patient[key] = data
+
+# --- METRICS ---
+INGEST_SAMPLES = REGISTRY.counter("vitalguard_ingest_samples", "Samples ingested", ["patient_id"])
+INGEST_SECONDS = REGISTRY.summary("vitalguard_ingest_seconds", "Time to store one /update sample", ["patient_id"])
+INGEST_REQUEST_SECONDS = REGISTRY.histogram("vitalguard_ingest_request_seconds", "Ingest request handling time", ["endpoint"])
+SECONDS_SINCE_SAMPLE = REGISTRY.gauge("vitalguard_seconds_since_last_sample", "Age of each bed's newest sample", ["patient_id"])
+STREAM_CLIENTS = REGISTRY.gauge("vitalguard_stream_subscribers", "Connected /stream clients")
+METRICS_PUSH_TTL = 300  # seconds before a silent dashboard's pushed metrics are dropped
+METRICS_PUSH_MAX_SOURCES = 64  # distinct pushers kept at once
+# Shared secret dashboards send with each push; pushes are refused while it is unset
+METRICS_PUSH_TOKEN = os.environ.get("METRICS_PUSH_TOKEN")
+last_ingest_at = {}  # patient_id -> wall-clock receive time
+pushed_metrics = {}  # source -> (received_at, families)
+
+def record_ingest(key, received_at, count=1):
+    INGEST_SAMPLES.inc(count, patient_id=key)
+    last_ingest_at[key] = received_at
+
+# --- LIVE STREAM (SSE) ---
+STREAM_QUEUE_SIZE = 256
+STREAM_KEEPALIVE_SECONDS = 15
+# One bounded queue per connected client -> patient_id filter (None = all beds)
+stream_subscribers = {}
+
+def publish(key, data):
+    """Push a sample to every matching /stream client without blocking ingest"""
+    for queue, patient_filter in stream_subscribers.items():
+        if patient_filter is not None and patient_filter != key:
+            continue
+        if queue.full():
+            # Slow client: drop its oldest sample rather than stall writers
+            queue.get_nowait()
+        queue.put_nowait(data)
 
 @app.post("/update")
 async def update_vitals(data: dict):
-    global current_data
-    current_data = data
+    start = time.perf_counter()
+    key = patient_key(data)
+    received_at = time.time()
+    check_vitals(key, data)
+    data = score_ingest(key, data)
+    set_latest(key, data)
+    row = history_row(data, received_at)
+    get_history_buffer(key).append(row)
+    archive.append(key, [row])
+    publish(key, data)
+    record_ingest(key, received_at)
+    elapsed = time.perf_counter() - start
+    INGEST_SECONDS.observe(elapsed, patient_id=key)
+    INGEST_REQUEST_SECONDS.observe(elapsed, endpoint="update")
     # We return immediately so the feeder doesn't time out
     return {"status": "success"}
 
+@app.post("/update/batch")
+async def update_vitals_batch(samples: List[dict]):
+    """Apply many samples (any mix of beds) in one request, in list order"""
+    start = time.perf_counter()
+    received_at = time.time()
+    # Validate the whole batch first, so a bad sample cannot leave it half scored
+    for data in samples:
+        check_vitals(patient_key(data), data)
+    samples = [score_ingest(patient_key(data), data) for data in samples]
+    rows_by_patient = {}
+    last_sample = {}
+    for data in samples:
+        key = patient_key(data)
+        rows_by_patient.setdefault(key, []).append(history_row(data, received_at))
+        last_sample.pop(key, None)
+        last_sample[key] = data
+    # One ring-buffer write per bed; beds keep the order of their last sample
+    for key, rows in rows_by_patient.items():
+        get_history_buffer(key).extend(rows)
+        archive.append(key, rows)
+    for key, data in last_sample.items():
+        set_latest(key, data)
+    for data in samples:
+        publish(patient_key(data), data)
+    for key, rows in rows_by_patient.items():
+        record_ingest(key, received_at, len(rows))
+    INGEST_REQUEST_SECONDS.observe(time.perf_counter() - start, endpoint="batch")
+    return {"status": "success", "count": len(samples), "patients": len(rows_by_patient)}
+
 @app.get("/latest")
-async def get_latest():
-    return current_data
\ No newline at end of file
+async def get_latest(all: bool = False):
+    """Most recent sample from any bed, or every bed at once with ?all=true"""
+    if all:
+        return latest_by_patient
+    if not latest_by_patient:
+        return {}
+    return latest_by_patient[next(reversed(latest_by_patient))]
+
+@app.get("/latest/{patient_id}")
+async def get_latest_for_patient(patient_id: str):
+    try:
+        return latest_by_patient[patient_id]
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No data for patient {patient_id}")
+
+@app.get("/stream")
+async def stream_vitals(patient_id: str = None):
+    """Server-Sent Events feed of every new sample, optionally for one bed"""
+    queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    stream_subscribers[queue] = patient_id
+
+    async def events():
+        try:
+            while True:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies (and client read timeouts) from closing idle streams
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"data: {json.dumps(data)}\n\n"
+        finally:
+            stream_subscribers.pop(queue, None)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/history/{patient_id}")
+async def get_history(patient_id: str, since: str = None, limit: int = None):
+    """Column-oriented slice of a bed's history (since: epoch seconds or ISO-8601)"""
+    buffer = history_by_patient.get(patient_id)
+    if buffer is None:
+        raise HTTPException(status_code=404, detail=f"No data for patient {patient_id}")
+    since_ts, _ = parse_range_args(since, limit)
+    return history_payload(patient_id, buffer.range(since=since_ts, limit=limit))
+
+@app.get("/archive/{patient_id}")
+async def get_archive(patient_id: str, since: str = None, until: str = None, limit: int = None):
+    """Archived samples beyond the in-memory hour, e.g. for shift-handover review"""
+    if patient_id not in archive:
+        raise HTTPException(status_code=404, detail=f"No archive for patient {patient_id}")
+    since_ts, until_ts = parse_range_args(since, limit, until)
+    return history_payload(patient_id, archive.range(patient_id, since=since_ts, until=until_ts, limit=limit))
+
+@app.post("/metrics/push")
+async def push_metrics(payload: dict, token: str = Header(None, alias=TOKEN_HEADER)):
+    """Metric snapshot from another process (e.g. a dashboard session), served by /metrics"""
+    if not METRICS_PUSH_TOKEN or token is None or not hmac.compare_digest(token, METRICS_PUSH_TOKEN):
+        raise HTTPException(status_code=403, detail="Missing or invalid metrics push token")
+    source = str(payload.get("source", "unknown"))
+    families = payload.get("families")
+    try:
+        validate_families(families)  # names, types and values go into the scrape verbatim
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if source not in pushed_metrics:
+        drop_expired_pushes(time.time())
+        if len(pushed_metrics) >= METRICS_PUSH_MAX_SOURCES:
+            raise HTTPException(status_code=429, detail="Too many metrics sources")
+    pushed_metrics[source] = (time.time(), families)
+    return {"status": "success"}
+
+def drop_expired_pushes(now):
+    for source, (received_at, _) in list(pushed_metrics.items()):
+        if now - received_at > METRICS_PUSH_TTL:
+            pushed_metrics.pop(source, None)
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of backend metrics plus recently pushed dashboard metrics"""
+    now = time.time()
+    for key, received_at in last_ingest_at.items():
+        SECONDS_SINCE_SAMPLE.set(round(now - received_at, 3), patient_id=key)
+    STREAM_CLIENTS.set(len(stream_subscribers))
+    groups = [(REGISTRY.families(), {})]
+    drop_expired_pushes(now)
+    for source, (received_at, families) in list(pushed_metrics.items()):
+        groups.append((families, {"source": source}))
+    return PlainTextResponse(render(groups), media_type=CONTENT_TYPE)
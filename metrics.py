@@ -0,0 +1,232 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# --- LIGHTWEIGHT METRICS (Prometheus text format, no client library) ---
+# Backend and dashboard each keep a REGISTRY; the dashboard pushes snapshots of
+# its own to the backend, which serves everything at GET /metrics.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+TOKEN_HEADER = "X-Metrics-Token"  # shared secret a pusher must send
+METRIC_NAME = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+LABEL_NAME = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+# Sample name suffixes each metric type may emit
+TYPE_SUFFIXES = {
+    "counter": ("_total",),
+    "gauge": ("",),
+    "summary": ("_count", "_sum"),
+    "histogram": ("_bucket", "_count", "_sum"),
+}
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def family(self):
+        """JSON-friendly snapshot: name, help, type and [suffix, labels, value] samples"""
+        with self._lock:
+            samples = list(self._samples())
+        return {"name": self.name, "help": self.help, "type": self.kind, "samples": samples}
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield ["_total", self._labels(key), value]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield ["", self._labels(key), value]
+
+class Summary(_Metric):
+    """Count and sum only: cheap enough to keep one series per patient"""
+    kind = "summary"
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            count, total = self._values.get(key, (0, 0.0))
+            self._values[key] = (count + 1, total + value)
+
+    def _samples(self):
+        for key, (count, total) in self._values.items():
+            labels = self._labels(key)
+            yield ["_count", labels, count]
+            yield ["_sum", labels, total]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += 1
+            state[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        for key, (counts, count, total) in self._values.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                yield ["_bucket", dict(labels, le=repr(float(bound))), cumulative]
+            yield ["_bucket", dict(labels, le="+Inf"), count]
+            yield ["_count", labels, count]
+            yield ["_sum", labels, total]
+
+class MetricsRegistry:
+    """Get-or-create by name, so modules re-executed on a Streamlit rerun reuse their metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._get(Gauge, name, help, labelnames)
+
+    def summary(self, name, help, labelnames=()):
+        return self._get(Summary, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def families(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [metric.family() for metric in metrics]
+
+REGISTRY = MetricsRegistry()
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def validate_families(families):
+    """Raise ValueError unless pushed families are safe to write into the exposition verbatim"""
+    if not isinstance(families, list):
+        raise ValueError("families must be a list")
+    for family in families:
+        if not isinstance(family, dict):
+            raise ValueError("each family must be an object")
+        name, kind, samples = family.get("name"), family.get("type"), family.get("samples")
+        if not isinstance(name, str) or not METRIC_NAME.fullmatch(name):
+            raise ValueError(f"invalid metric name: {name!r}")
+        if kind not in TYPE_SUFFIXES:
+            raise ValueError(f"unsupported metric type for {name}: {kind!r}")
+        if not isinstance(family.get("help"), str) or not isinstance(samples, list):
+            raise ValueError(f"{name} needs a help string and a list of samples")
+        for sample in samples:
+            if not (isinstance(sample, list) and len(sample) == 3):
+                raise ValueError(f"{name} samples must be [suffix, labels, value]")
+            suffix, labels, value = sample
+            if suffix not in TYPE_SUFFIXES[kind]:
+                raise ValueError(f"invalid sample suffix for {kind} {name}: {suffix!r}")
+            if not isinstance(labels, dict) or not all(isinstance(k, str) and LABEL_NAME.fullmatch(k) for k in labels):
+                raise ValueError(f"invalid label names for {name}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"non-numeric sample value for {name}")
+
+def render(groups):
+    """Prometheus text for (families, extra_labels) groups; same-name families share one header"""
+    merged = {}
+    for families, extra_labels in groups:
+        for family in families:
+            entry = merged.setdefault(family["name"], (family, []))
+            for suffix, labels, value in family["samples"]:
+                entry[1].append((suffix, dict(labels, **extra_labels), value))
+    lines = []
+    for name, (family, samples) in merged.items():
+        lines.append(f"# HELP {name} {_escape(family['help'])}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for suffix, labels, value in samples:
+            label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            label_text = "{" + label_text + "}" if label_text else ""
+            lines.append(f"{name}{suffix}{label_text} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+class MetricsPusher(threading.Thread):
+    """Posts this process's registry to the backend every `interval` seconds"""
+
+    def __init__(self, url, client, source, token, interval=15, registry=REGISTRY):
+        super().__init__(daemon=True)
+        self.url = url
+        self.client = client
+        self.source = source
+        self.headers = {TOKEN_HEADER: token}
+        self.interval = interval
+        self.registry = registry
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.client.post(self.url, json={"source": self.source, "families": self.registry.families()},
+                                 headers=self.headers, timeout=5)
+            except Exception:
+                pass  # metrics must never break the dashboard; the next push retries
+
+    def stop(self):
+        self._stop_event.set()
@@ -0,0 +1,437 @@
+import argparse
+import heapq
+import math
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# --- THRESHOLD TABLE (shared by risk scoring, vital status and alerting) ---
+# Each vital splits into five bands by two low and two high breakpoints:
+#   0 critical low | 1 low | 2 normal | 3 high | 4 critical high
+# A value is in a low band when it is *below* a low breakpoint and in a high
+# band when it is *above* a high breakpoint, matching the original rule chains.
+CRITICAL_LOW, LOW, NORMAL, HIGH, CRITICAL_HIGH = range(5)
+BAND_STATUS = ('critical', 'warning', 'normal', 'warning', 'critical')
+STATUS_COLORS = {'normal': '#00ff88', 'warning': '#ffaa00', 'critical': '#ff3333'}
+
+DEFAULT_THRESHOLDS = {
+    'hr': ((50, 60), (100, 130)),
+    'temp': ((95, 97), (100.4, 103)),
+    'systolic': ((80, 90), (140, 180)),
+    'diastolic': ((50, 60), (90, 120)),
+    'spo2': ((90, 95), (math.inf, math.inf)),
+}
+
+# What each abnormal band contributes: risk points, risk-factor label, and the
+# alert title / nursing action / alert-context label shown for it.
+BandRule = namedtuple('BandRule', ['risk', 'factor', 'alert', 'action', 'context'])
+BAND_RULES = {
+    'hr': {
+        CRITICAL_LOW: BandRule(4, "Severe Bradycardia", "Severe Bradycardia", "Urgent assessment needed", "Critical HR"),
+        LOW: BandRule(2, "Bradycardia", "Bradycardia", "Continue monitoring", "Low HR"),
+        HIGH: BandRule(2, "Tachycardia", "Tachycardia", "Monitor closely", "High HR"),
+        CRITICAL_HIGH: BandRule(4, "Severe Tachycardia", "Severe Tachycardia", "Immediate intervention required", "Critical HR"),
+    },
+    'temp': {
+        CRITICAL_LOW: BandRule(4, "Severe Hypothermia", "Severe Hypothermia", "Warming protocol initiated", "Critical Temp"),
+        LOW: BandRule(2, "Mild Hypothermia", "Mild Hypothermia", "Apply warming measures", "Low Temp"),
+        HIGH: BandRule(2, "Fever", "Fever detected", "Consider antipyretics", "Elevated Temp"),
+        CRITICAL_HIGH: BandRule(4, "High-grade Fever", "High-grade Fever", "Antipyretics & cooling measures", "Critical Temp"),
+    },
+    # Blood pressure is scored once, from whichever of systolic/diastolic is worse
+    'bp': {
+        CRITICAL_LOW: BandRule(5, "Severe Hypotension", "Severe Hypotension", "Fluid resuscitation/pressors", "Critical BP"),
+        LOW: BandRule(3, "Hypotension", "Hypotension", "Assess perfusion", "Low BP"),
+        HIGH: BandRule(2, "Hypertension", "Hypertension", "Monitor and document", "High BP"),
+        CRITICAL_HIGH: BandRule(5, "Hypertensive Crisis", "Hypertensive Crisis", "Urgent BP control needed", "Critical BP"),
+    },
+    'spo2': {
+        CRITICAL_LOW: BandRule(5, "Critical Hypoxemia", "Severe Hypoxemia", "Increase O2, assess airway", "Critical SpO2"),
+        LOW: BandRule(3, "Hypoxemia", "Low SpO2", "Supplemental oxygen recommended", "Low SpO2"),
+    },
+}
+# Which systolic/diastolic band wins for BP: crisis, hypertension, severe hypotension, hypotension
+BP_BAND_PRIORITY = (CRITICAL_HIGH, HIGH, CRITICAL_LOW, LOW, NORMAL)
+_BP_RANK = np.argsort(BP_BAND_PRIORITY)  # band -> priority rank
+
+def combine_bp_bands(systolic_band, diastolic_band):
+    """BP band from the systolic and diastolic bands (works on scalars and arrays)"""
+    return np.where(_BP_RANK[systolic_band] <= _BP_RANK[diastolic_band], systolic_band, diastolic_band)
+
+VitalAssessment = namedtuple('VitalAssessment', ['risk', 'risk_factors', 'status', 'alerts'])
+# vital/band identify the condition, so the alert engine can track it across samples
+Alert = namedtuple('Alert', ['severity', 'title', 'value', 'action', 'context', 'vital', 'band'])
+
+class ThresholdTable:
+    """Compiled breakpoints for every vital; one sorted lookup per vital gives its band.
+
+    Pass overrides such as {'hr': ((45, 55), (110, 140))} for per-patient limits.
+    """
+
+    def __init__(self, overrides=None):
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        self.thresholds.update(overrides or {})
+        self._lows = {v: tuple(lows) for v, (lows, highs) in self.thresholds.items()}
+        self._highs = {v: tuple(highs) for v, (lows, highs) in self.thresholds.items()}
+        self._low_arrays = {v: np.asarray(lows, dtype=float) for v, lows in self._lows.items()}
+        self._high_arrays = {v: np.asarray(highs, dtype=float) for v, highs in self._highs.items()}
+
+    def band(self, vital, value):
+        """Band of one reading (missing/NaN readings count as normal)"""
+        if value != value:
+            return NORMAL
+        return bisect_right(self._lows[vital], value) + bisect_left(self._highs[vital], value)
+
+    def bands(self, vital, values):
+        """Vectorized band(): np.searchsorted over the same breakpoints"""
+        values = np.asarray(values, dtype=float)
+        bands = (np.searchsorted(self._low_arrays[vital], values, side='right')
+                 + np.searchsorted(self._high_arrays[vital], values, side='left'))
+        return np.where(np.isnan(values), NORMAL, bands)
+
+    def vital_bands(self, hr, temp, systolic, diastolic, spo2=98):
+        return {
+            'hr': self.band('hr', hr),
+            'temp': self.band('temp', temp),
+            'systolic': self.band('systolic', systolic),
+            'diastolic': self.band('diastolic', diastolic),
+            'spo2': self.band('spo2', spo2),
+        }
+
+    def assess(self, hr, temp, systolic, diastolic, spo2=98):
+        """One pass over the table: status per vital, base risk, factors and alerts"""
+        return assess_bands(self.vital_bands(hr, temp, systolic, diastolic, spo2), hr, temp, systolic, diastolic, spo2)
+
+def assess_bands(bands, hr, temp, systolic, diastolic, spo2=98):
+    """Base assessment from each vital's band; needs no thresholds, only BAND_RULES"""
+    status = {vital: (BAND_STATUS[b], STATUS_COLORS[BAND_STATUS[b]]) for vital, b in bands.items()}
+    rule_bands = (
+        ('hr', bands['hr'], f"{hr} BPM", f"{hr}"),
+        ('temp', bands['temp'], f"{temp} °F", f"{temp}"),
+        ('bp', int(combine_bp_bands(bands['systolic'], bands['diastolic'])),
+         f"{systolic}/{diastolic}", f"{systolic}/{diastolic}"),
+        ('spo2', bands['spo2'], f"SpO2 {spo2}%", f"{spo2}"),
+    )
+    risk = 0
+    risk_factors = []
+    alerts = []
+    for rule_name, band, value_text, context_value in rule_bands:
+        rule = BAND_RULES[rule_name].get(band)
+        if rule is None:
+            continue
+        risk += rule.risk
+        risk_factors.append(rule.factor)
+        alerts.append(Alert(BAND_STATUS[band], rule.alert, value_text, rule.action,
+                            f"{rule.context}: {context_value}", rule_name, band))
+    # Multi-organ involvement (combination of abnormalities)
+    abnormal_count = sum(b != NORMAL for b in bands.values())
+    if abnormal_count >= 3:
+        risk += 2
+        risk_factors.append("Multi-system Involvement")
+    return VitalAssessment(risk, risk_factors, status, alerts)
+
+DEFAULT_TABLE = ThresholdTable()
+
+# Per-patient limits, e.g. {"1": {'hr': ((45, 55), (110, 140))}}; other beds use the defaults
+PATIENT_THRESHOLD_OVERRIDES = {}
+_patient_tables = {}
+
+def get_threshold_table(patient_id):
+    """Compiled table for a bed, built once from PATIENT_THRESHOLD_OVERRIDES"""
+    table = _patient_tables.get(patient_id)
+    if table is None:
+        overrides = PATIENT_THRESHOLD_OVERRIDES.get(patient_id)
+        table = ThresholdTable(overrides) if overrides else DEFAULT_TABLE
+        _patient_tables[patient_id] = table
+    return table
+
+# --- SCALAR SCORING (one sample per call, used at ingest by the backend) ---
+TREND_WINDOW = 5  # prior scores looked at by the trend rules
+
+def trend_risk(recent_risks):
+    """Extra risk from the last 5 scores: rapid deterioration and sustained elevation"""
+    risk = 0
+    risk_factors = []
+    if len(recent_risks) >= 2:
+        
+        # Rapid deterioration detection
+        if recent_risks[-1] - recent_risks[0] >= 3:
+            risk += 2
+            risk_factors.append("Rapid Deterioration")
+        
+        # Sustained elevation
+        if all(r >= 5 for r in recent_risks[-3:]):
+            risk += 1
+            risk_factors.append("Sustained High Risk")
+    return risk, risk_factors
+
+def assess_vitals(hr, temp, systolic, diastolic, spo2=98, history_df=None, table=DEFAULT_TABLE,
+                  recent_risks=None):
+    """Full assessment of one sample: final risk (with trend), factors, status and alerts.
+
+    recent_risks (the last TREND_WINDOW prior scores, e.g. from a RollingStats
+    window) takes precedence over reading them from history_df.
+    """
+    base = table.assess(hr, temp, systolic, diastolic, spo2)
+    risk, risk_factors = base.risk, list(base.risk_factors)
+    
+    if recent_risks is None and history_df is not None:
+        recent_risks = history_df['RiskScore'].tail(TREND_WINDOW).tolist()
+    
+    # Trend analysis (if history available)
+    if recent_risks is not None and len(recent_risks) >= TREND_WINDOW:
+        extra, trend_factors = trend_risk(list(recent_risks)[-TREND_WINDOW:])
+        risk += extra
+        # Trend factors come before the multi-system factor, as they always have
+        if trend_factors:
+            multi = risk_factors[-1:] == ["Multi-system Involvement"]
+            insert_at = len(risk_factors) - 1 if multi else len(risk_factors)
+            risk_factors[insert_at:insert_at] = trend_factors
+    
+    return base._replace(risk=min(risk, 10), risk_factors=risk_factors)
+
+def calculate_advanced_risk_score(hr, temp, systolic, diastolic, spo2=98, history_df=None, table=DEFAULT_TABLE,
+                                  recent_risks=None):
+    """Enhanced risk calculation with trend analysis and multi-factor scoring"""
+    assessment = assess_vitals(hr, temp, systolic, diastolic, spo2, history_df, table, recent_risks)
+    return assessment.risk, assessment.risk_factors
+
+def get_risk_level(score):
+    """Enhanced risk categorization"""
+    if score <= 2:
+        return "Low", "#00ff88", "✓"
+    elif score <= 4:
+        return "Moderate", "#ffdd00", "⚠"
+    elif score <= 6:
+        return "Elevated", "#ffaa00", "⚠⚠"
+    elif score <= 8:
+        return "High", "#ff6600", "⚠⚠⚠"
+    else:
+        return "Critical", "#ff3333", "🚨"
+
+def get_vital_status(vital_type, value, table=DEFAULT_TABLE):
+    """Determine if a vital is in normal, warning, or critical range"""
+    if vital_type not in table.thresholds:
+        return 'normal', STATUS_COLORS['normal']
+    status = BAND_STATUS[table.band(vital_type, value)]
+    return status, STATUS_COLORS[status]
+
+# --- INGEST ENRICHMENT (scored once by the backend, read by every dashboard) ---
+# The backend adds these fields to each sample before storing and serving it.
+# vital_bands keeps the band behind each status, so readers can rebuild the
+# statuses and alert text without a threshold table or re-scoring.
+SCORE_FIELDS = ('risk_score', 'risk_level', 'risk_factors', 'vital_status', 'vital_bands')
+# payload field and default for each vital; the defaults are normal readings, and
+# heart_rate has none (a missing HR must not be scored as 0 = severe bradycardia)
+SAMPLE_FIELDS = (
+    ('hr', 'heart_rate', None),
+    ('temp', 'body_temperature', 98.6),
+    ('systolic', 'systolic_bp', 120),
+    ('diastolic', 'diastolic_bp', 80),
+    ('spo2', 'spo2', 98),
+)
+
+def sample_vitals(data):
+    """(hr, temp, systolic, diastolic, spo2) from a payload, rounded like the dashboard shows them.
+
+    Missing or null readings take the defaults. A missing heart rate, booleans,
+    non-numeric values and NaN/Infinity (which JSON parsers accept) raise
+    ValueError/TypeError.
+    """
+    values = {}
+    for vital, field, default in SAMPLE_FIELDS:
+        value = data.get(field)
+        if value is None:
+            if default is None:
+                raise ValueError(f"{field} is missing")
+            value = default
+        if isinstance(value, bool):
+            raise TypeError(f"{field} is a boolean: {value}")
+        values[vital] = float(value)
+        if not math.isfinite(values[vital]):
+            raise ValueError(f"{field} is not finite: {value}")
+    return (round(values['hr'], 1), round(values['temp'], 1), int(round(values['systolic'])),
+            int(round(values['diastolic'])), int(round(values['spo2'])))
+
+def score_sample(data, recent_risks=None, table=DEFAULT_TABLE):
+    """Copy of a payload with the SCORE_FIELDS added (recent_risks: the bed's prior scores)"""
+    hr, temp, systolic, diastolic, spo2 = sample_vitals(data)
+    bands = table.vital_bands(hr, temp, systolic, diastolic, spo2)
+    assessment = assess_vitals(hr, temp, systolic, diastolic, spo2, table=table, recent_risks=recent_risks)
+    scored = dict(data)
+    scored.update(
+        risk_score=assessment.risk,
+        risk_level=get_risk_level(assessment.risk)[0],
+        risk_factors=assessment.risk_factors,
+        vital_status={vital: BAND_STATUS[band] for vital, band in bands.items()},
+        vital_bands=bands,
+    )
+    return scored
+
+def assessment_from_record(data):
+    """VitalAssessment of a backend-scored sample, or None if the sample was not scored"""
+    if any(field not in data for field in SCORE_FIELDS):
+        return None
+    base = assess_bands(data['vital_bands'], *sample_vitals(data))
+    return base._replace(risk=data['risk_score'], risk_factors=list(data['risk_factors']))
+
+# --- VECTORIZED BATCH SCORING ---
+# Factor labels in the order the scalar path appends them; bit i of a factor
+# mask is RISK_FACTOR_LABELS[i], so decoding in bit order reproduces that order.
+RISK_FACTOR_LABELS = (
+    "Severe Bradycardia", "Bradycardia", "Severe Tachycardia", "Tachycardia",
+    "High-grade Fever", "Fever", "Severe Hypothermia", "Mild Hypothermia",
+    "Hypertensive Crisis", "Hypertension", "Severe Hypotension", "Hypotension",
+    "Critical Hypoxemia", "Hypoxemia",
+    "Rapid Deterioration", "Sustained High Risk", "Multi-system Involvement",
+)
+_BIT = {label: 1 << i for i, label in enumerate(RISK_FACTOR_LABELS)}
+SCALAR_CUTOFF = 256  # below this many unsettled samples, a plain loop beats another NumPy pass
+
+# Per-band risk points and factor bits for each rule, indexed by band
+_RULE_RISK = {name: np.zeros(5, dtype=np.int64) for name in BAND_RULES}
+_RULE_BITS = {name: np.zeros(5, dtype=np.int64) for name in BAND_RULES}
+for _name, _rules in BAND_RULES.items():
+    for _band, _rule in _rules.items():
+        _RULE_RISK[_name][_band] = _rule.risk
+        _RULE_BITS[_name][_band] = _BIT[_rule.factor]
+
+def _trend_terms(scores, idx):
+    """Rapid-deterioration and sustained-high-risk terms for the samples at idx.
+
+    scores holds final (capped) scores; sample i looks at scores[i-5:i],
+    exactly like history_df['RiskScore'].tail(5) in the scalar path.
+    """
+    rapid = scores[idx - 1] - scores[idx - TREND_WINDOW] >= 3
+    sustained = (scores[idx - 1] >= 5) & (scores[idx - 2] >= 5) & (scores[idx - 3] >= 5)
+    risk = rapid * 2 + sustained
+    bits = rapid * _BIT["Rapid Deterioration"] | sustained * _BIT["Sustained High Risk"]
+    return risk, bits
+
+def _settle_in_order(scores, base, trend_bits, offset, pending):
+    """Finish the recurrence for the few samples still moving, lowest index first"""
+    # Plain lists: element access is much cheaper than NumPy scalar indexing
+    values = scores.tolist()
+    base_values = base.tolist()
+    settled_bits = {}
+    n = len(values)
+    heapq.heapify(pending)
+    queued = set(pending)
+    while pending:
+        i = heapq.heappop(pending)
+        queued.discard(i)
+        rapid = values[i - 1] - values[i - TREND_WINDOW] >= 3
+        sustained = values[i - 1] >= 5 and values[i - 2] >= 5 and values[i - 3] >= 5
+        settled_bits[i] = rapid * _BIT["Rapid Deterioration"] | sustained * _BIT["Sustained High Risk"]
+        updated = min(base_values[i - offset] + rapid * 2 + sustained, 10)
+        if updated != values[i]:
+            values[i] = updated
+            for j in range(i + 1, min(i + TREND_WINDOW + 1, n)):
+                if j not in queued:
+                    queued.add(j)
+                    heapq.heappush(pending, j)
+    scores[:] = values
+    trend_bits[list(settled_bits)] = list(settled_bits.values())
+
+def score_risk_batch(hr, temp, systolic, diastolic, spo2=98, prior_scores=(), table=DEFAULT_TABLE):
+    """Score many consecutive samples at once.
+
+    Returns (scores, factor_masks) equal, sample by sample, to calling
+    calculate_advanced_risk_score in order with the growing history, seeded
+    with prior_scores (the RiskScore column already in history). Decode a
+    mask with decode_risk_factors.
+    """
+    hr = np.asarray(hr, dtype=float)
+    spo2 = np.broadcast_to(np.asarray(spo2, dtype=float), hr.shape)
+    bands = {
+        'hr': table.bands('hr', hr),
+        'temp': table.bands('temp', temp),
+        'systolic': table.bands('systolic', systolic),
+        'diastolic': table.bands('diastolic', diastolic),
+        'spo2': table.bands('spo2', spo2),
+    }
+    rule_bands = {
+        'hr': bands['hr'],
+        'temp': bands['temp'],
+        'bp': combine_bp_bands(bands['systolic'], bands['diastolic']),
+        'spo2': bands['spo2'],
+    }
+    multi = sum((b != NORMAL).astype(np.int64) for b in bands.values()) >= 3
+    base = sum(_RULE_RISK[name][b] for name, b in rule_bands.items()) + multi * 2
+    base_bits = multi * _BIT["Multi-system Involvement"]
+    for name, b in rule_bands.items():
+        base_bits = base_bits | _RULE_BITS[name][b]
+
+    # Trend terms read earlier *final* scores, so solve the recurrence by
+    # fixed-point iteration: score every sample from the current guesses, then
+    # re-score only the samples whose 5-sample window contains a change. The
+    # dependencies only point backwards, so this settles on the exact result.
+    # Once few samples are still moving (a single long cascade), finish them
+    # one at a time in index order, which visits each of them only once.
+    prior = np.asarray(prior_scores, dtype=np.int64)
+    offset = len(prior)
+    scores = np.concatenate([prior, np.minimum(base, 10)])
+    trend_bits = np.zeros(len(scores), dtype=np.int64)
+    idx = np.arange(max(offset, TREND_WINDOW), len(scores))
+    while idx.size >= SCALAR_CUTOFF:
+        trend_risk, bits = _trend_terms(scores, idx)
+        trend_bits[idx] = bits
+        updated = np.minimum(base[idx - offset] + trend_risk, 10)
+        changed = idx[updated != scores[idx]]
+        scores[idx] = updated
+        if changed.size == 0:
+            idx = changed
+            break
+        # Mark the samples whose window saw a change (a mask over just the span, no sort)
+        lo, hi = changed[0] + 1, min(changed[-1] + TREND_WINDOW + 1, len(scores))
+        dirty = np.zeros(hi - lo, dtype=bool)
+        for step in range(TREND_WINDOW):
+            dirty[changed[changed + 1 + step < hi] + step + 1 - lo] = True
+        idx = lo + np.flatnonzero(dirty)
+    if idx.size:
+        _settle_in_order(scores, base, trend_bits, offset, idx.tolist())
+
+    return scores[offset:], base_bits | trend_bits[offset:]
+
+@lru_cache(maxsize=None)
+def decode_risk_factors(mask):
+    """Factor labels for one mask, in the scalar path's order"""
+    return [label for i, label in enumerate(RISK_FACTOR_LABELS) if mask >> i & 1]
+
+# --- ARCHIVE BACKFILL ---
+# Column names of patient_history.csv-style archives
+ARCHIVE_COLUMNS = {'hr': 'heart_rate', 'temp': 'temp', 'systolic': 'sys_bp', 'diastolic': 'dia_bp', 'spo2': 'spo2'}
+
+def _round_tenths(values):
+    # Python's round() per value: np.round(x, 1) scales by 10 first and can disagree on ties
+    return np.array([round(v, 1) for v in np.asarray(values, dtype=float).tolist()])
+
+def score_archive(df, columns=ARCHIVE_COLUMNS):
+    """Add RiskScore / RiskFactors columns to a recorded vitals frame (rows in time order).
+
+    Readings are rounded like sample_vitals first, so the backfill matches what ingest scores.
+    """
+    spo2 = np.round(df[columns['spo2']].to_numpy(dtype=float)) if columns['spo2'] in df else 98
+    scores, masks = score_risk_batch(
+        _round_tenths(df[columns['hr']]), _round_tenths(df[columns['temp']]),
+        np.round(df[columns['systolic']].to_numpy(dtype=float)),
+        np.round(df[columns['diastolic']].to_numpy(dtype=float)), spo2
+    )
+    scored = df.copy()
+    scored['RiskScore'] = scores
+    scored['RiskFactors'] = [', '.join(decode_risk_factors(int(m))) or 'None' for m in masks]
+    return scored
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill risk scores into a recorded vitals CSV")
+    parser.add_argument("csv_path")
+    parser.add_argument("-o", "--output", help="Write the scored CSV here instead of printing it")
+    args = parser.parse_args()
+    scored = score_archive(pd.read_csv(args.csv_path))
+    if args.output:
+        scored.to_csv(args.output, index=False)
+    else:
+        print(scored.to_string(index=False))
@@ -0,0 +1,154 @@
+from collections import deque
+
+from vitals_history import NUMERIC_COLUMNS
+
+# --- STREAMING ROLLING STATISTICS (per patient, O(1) per sample) ---
+STATS_WINDOW = 5  # readings per rolling window, as in the trend rules
+EWMA_ALPHA = 0.3
+# Least-squares slope (units per reading) below which a trend counts as stable
+SLOPE_TOLERANCE = {'HR': 0.5, 'Temp': 0.05, 'Systolic': 1.0, 'Diastolic': 1.0, 'SpO2': 0.25, 'RiskScore': 0.25}
+
+class RollingStats:
+    """Mean, variance, slope, min/max and EWMA over the last `window` readings of one series.
+
+    Running sums are adjusted as readings enter and leave the window and are
+    rebuilt from the window once per `window` pushes, so rounding never drifts.
+    Min/max use monotonic deques. NaN readings are ignored.
+    """
+
+    def __init__(self, window=STATS_WINDOW, alpha=EWMA_ALPHA):
+        self.window = window
+        self.alpha = alpha
+        self.clear()
+
+    def clear(self):
+        self._values = deque(maxlen=self.window)
+        self._lows = deque()   # (seq, value), values increasing
+        self._highs = deque()  # (seq, value), values decreasing
+        self._seq = 0
+        self._sum = self._sum_sq = self._sum_xy = 0.0  # x = position inside the window
+        self._since_resync = 0
+        self.ewma = None
+        self.count = 0  # readings ever pushed
+
+    def push(self, value):
+        value = float(value)
+        if value != value:
+            return
+        n = len(self._values)
+        if n == self.window:
+            oldest = self._values[0]
+            # Drop position 0 and shift every other reading one place left
+            self._sum_xy += (n - 1) * value - (self._sum - oldest)
+            self._sum += value - oldest
+            self._sum_sq += value * value - oldest * oldest
+        else:
+            self._sum_xy += n * value
+            self._sum += value
+            self._sum_sq += value * value
+        self._values.append(value)
+
+        seq = self._seq
+        self._seq += 1
+        while self._lows and self._lows[-1][1] >= value:
+            self._lows.pop()
+        self._lows.append((seq, value))
+        while self._highs and self._highs[-1][1] <= value:
+            self._highs.pop()
+        self._highs.append((seq, value))
+        expired = seq - self.window
+        if self._lows[0][0] <= expired:
+            self._lows.popleft()
+        if self._highs[0][0] <= expired:
+            self._highs.popleft()
+
+        self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+        self.count += 1
+        self._since_resync += 1
+        if self._since_resync >= self.window:
+            self._resync()
+
+    def _resync(self):
+        self._sum = sum(self._values)
+        self._sum_sq = sum(v * v for v in self._values)
+        self._sum_xy = sum(i * v for i, v in enumerate(self._values))
+        self._since_resync = 0
+
+    def __len__(self):
+        return len(self._values)
+
+    def full(self):
+        return len(self._values) == self.window
+
+    def values(self):
+        """Readings in the window, oldest first"""
+        return tuple(self._values)
+
+    @property
+    def last(self):
+        return self._values[-1] if self._values else None
+
+    @property
+    def delta(self):
+        """Change between the two newest readings"""
+        if len(self._values) < 2:
+            return None
+        return self._values[-1] - self._values[-2]
+
+    @property
+    def mean(self):
+        n = len(self._values)
+        return self._sum / n if n else None
+
+    @property
+    def variance(self):
+        n = len(self._values)
+        if n < 2:
+            return None
+        return max((self._sum_sq - self._sum * self._sum / n) / (n - 1), 0.0)
+
+    @property
+    def min(self):
+        return self._lows[0][1] if self._lows else None
+
+    @property
+    def max(self):
+        return self._highs[0][1] if self._highs else None
+
+    @property
+    def slope(self):
+        """Least-squares slope per reading across the window"""
+        n = len(self._values)
+        if n < 2:
+            return None
+        sum_x = n * (n - 1) / 2
+        sum_xx = (n - 1) * n * (2 * n - 1) / 6
+        return (n * self._sum_xy - sum_x * self._sum) / (n * sum_xx - sum_x * sum_x)
+
+    def trend(self, tolerance=0.0):
+        """1 rising, -1 falling, 0 stable (or too few readings)"""
+        slope = self.slope
+        if slope is None or abs(slope) <= tolerance:
+            return 0
+        return 1 if slope > 0 else -1
+
+class VitalsStats:
+    """One RollingStats per numeric vital for a patient, fed once per sample"""
+
+    def __init__(self, window=STATS_WINDOW, alpha=EWMA_ALPHA):
+        self.columns = {name: RollingStats(window, alpha) for name in NUMERIC_COLUMNS}
+
+    def update(self, row):
+        """Push one sample given as a dict keyed by NUMERIC_COLUMNS"""
+        for name, stats in self.columns.items():
+            stats.push(row[name])
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def trend(self, name):
+        return self.columns[name].trend(SLOPE_TOLERANCE.get(name, 0.0))
+
+    def clear(self):
+        for stats in self.columns.values():
+            stats.clear()
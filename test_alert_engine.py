@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+from alert_engine import AlertEngine, ONGOING, OPEN, RESOLVED, Severity
+from risk_engine import CRITICAL_HIGH, HIGH, Alert
+
+START = datetime(2024, 1, 1, 8, 0, 0)
+
+def tachycardia(severe=False):
+    band = CRITICAL_HIGH if severe else HIGH
+    return Alert('critical' if severe else 'warning', "Severe Tachycardia" if severe else "Tachycardia",
+                 "131 BPM" if severe else "105 BPM", "act", "High HR", 'hr', band)
+
+def fever():
+    return Alert('warning', "Fever detected", "101.0 °F", "act", "Elevated Temp", 'temp', HIGH)
+
+class Feed:
+    """Drives an engine one sample per second"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.now = START
+
+    def __call__(self, *alerts, seconds=1):
+        self.now += timedelta(seconds=seconds)
+        return self.engine.update(list(alerts), self.now)
+
+def test_persisting_condition_opens_once():
+    feed = Feed(AlertEngine())
+    opened = feed(tachycardia())
+    assert [(r.title, r.state) for r in opened] == [("Tachycardia", OPEN)]
+    for _ in range(5):
+        assert feed(tachycardia()) == []
+    (record,) = feed.engine.active()
+    assert record.state == ONGOING and record.count == 6
+    assert feed.engine.counts == {'info': 0, 'warning': 1, 'critical': 0}
+
+def test_escalation_notifies_and_moves_to_critical_index():
+    feed = Feed(AlertEngine())
+    feed(tachycardia())
+    (escalated,) = feed(tachycardia(severe=True))
+    assert escalated.severity == escalated.peak == Severity.CRITICAL
+    assert feed.engine.recent(Severity.WARNING) == []
+    assert [r.id for r in feed.engine.recent(Severity.CRITICAL)] == [escalated.id]
+    # Easing back to a warning keeps the record (and its peak) without notifying
+    assert feed(tachycardia()) == []
+    assert feed.engine.active()[0].severity == Severity.WARNING
+
+def test_critical_again_after_easing_notifies():
+    feed = Feed(AlertEngine())
+    feed(tachycardia(severe=True))
+    feed(tachycardia())
+    (again,) = feed(tachycardia(severe=True))
+    assert again.state == ONGOING
+    assert feed.engine.counts['critical'] == 2
+
+def test_resolves_only_after_clear_samples_without_it():
+    feed = Feed(AlertEngine(clear_samples=3))
+    feed(tachycardia())
+    feed()
+    feed()
+    assert feed.engine.active()  # two missed samples: still active
+    feed(tachycardia())
+    feed()
+    feed()
+    feed()
+    assert feed.engine.active() == []
+    (record,) = feed.engine.recent()
+    assert record.state == RESOLVED and record.resolved_at == feed.now
+
+def resolve(feed, *alerts):
+    feed(*alerts)
+    for _ in range(feed.engine.clear_samples):
+        feed()
+
+def test_warning_reopens_silently_within_reopen_window():
+    feed = Feed(AlertEngine(reopen_seconds=120))
+    resolve(feed, tachycardia())
+    first_id = feed.engine.recent()[0].id
+    assert feed(tachycardia()) == []
+    (record,) = feed.engine.active()
+    assert record.id == first_id and record.state == ONGOING and record.resolved_at is None
+    assert feed.engine.counts['warning'] == 1
+
+def test_critical_reopen_notifies_and_returns_to_top():
+    feed = Feed(AlertEngine(reopen_seconds=120))
+    resolve(feed, tachycardia(severe=True))
+    critical_id = feed.engine.recent()[0].id
+    feed(fever())
+    (reopened,) = feed(fever(), tachycardia(severe=True))
+    assert reopened.id == critical_id
+    assert feed.engine.recent()[0].id == critical_id
+    assert feed.engine.counts['critical'] == 2
+
+def test_return_after_reopen_window_opens_new_record():
+    feed = Feed(AlertEngine(reopen_seconds=120))
+    resolve(feed, tachycardia())
+    old_id = feed.engine.recent()[0].id
+    (record,) = feed(tachycardia(), seconds=121)
+    assert record.state == OPEN and record.id != old_id
+
+def test_eviction_drops_oldest_inactive_record_per_severity():
+    feed = Feed(AlertEngine(capacity=3, reopen_seconds=0))
+    feed(fever())  # stays active throughout
+    ids = []
+    for _ in range(4):
+        (record,) = feed(fever(), tachycardia())
+        ids.append(record.id)
+        for _ in range(feed.engine.clear_samples):
+            feed(fever())
+    warnings = [r.id for r in feed.engine.recent(Severity.WARNING, limit=10)]
+    assert len(warnings) == 3
+    assert ids[0] not in warnings and ids[1] not in warnings  # oldest resolved ones went first
+    assert any(r.title == "Fever detected" for r in feed.engine.active())
+    assert len(feed.engine) == 3
@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import jshttps
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(jshttps, "ARCHIVE_ROOT", str(tmp_path / "archive"))
+    for store in (jshttps.latest_by_patient, jshttps.history_by_patient, jshttps.recent_risks_by_patient):
+        store.clear()
+    with TestClient(jshttps.app) as client:
+        yield client
+
+def post_json(client, path, body):
+    # Python's JSON parser accepts NaN/Infinity literals, so send them verbatim
+    return client.post(path, content=body, headers={"content-type": "application/json"})
+
+@pytest.mark.parametrize("timestamp", ["NaN", "Infinity", '"nan"', '"inf"', '"1e300"', "-5"])
+def test_invalid_timestamp_is_rejected_and_latest_stays_servable(client, timestamp):
+    assert client.post("/update", json={"patient_id": 1, "heart_rate": 80, "timestamp": 1000}).status_code == 200
+    response = post_json(client, "/update", f'{{"patient_id": 1, "heart_rate": 80, "timestamp": {timestamp}}}')
+    assert response.status_code == 422
+    assert client.get("/latest").status_code == 200
+    assert client.get("/latest", params={"all": "true"}).json()["1"]["timestamp"] == 1000
+
+def test_time_of_day_timestamp_falls_back_to_receive_time(client):
+    assert client.post("/update", json={"patient_id": 1, "heart_rate": 80, "timestamp": "04:37:15"}).status_code == 200
+    assert client.get("/history/1").json()["count"] == 1
+
+@pytest.mark.parametrize("param", ["since", "until"])
+@pytest.mark.parametrize("value", ["nan", "inf", "1e300"])
+def test_archive_rejects_non_finite_range(client, param, value):
+    client.post("/update", json={"patient_id": 1, "heart_rate": 80, "timestamp": 1000})
+    assert client.get("/archive/1", params={param: value}).status_code == 422
+
+def test_archive_append_rejects_non_finite_timestamps(tmp_path):
+    archive = jshttps.VitalsArchive(jshttps.HISTORY_COLUMNS, root=str(tmp_path))
+    row = [float("nan")] + [80.0] * (len(jshttps.HISTORY_COLUMNS) - 1)
+    with pytest.raises(ValueError):
+        archive.append("1", [row])
+    archive.close()
+    assert jshttps.VitalsArchive(jshttps.HISTORY_COLUMNS, root=str(tmp_path)).patients() == []
+
+def test_restore_keys_window_on_newest_archived_sample(client):
+    # Replayed data: timestamps far in the past, 90 minutes of one-minute samples
+    samples = [{"patient_id": 7, "heart_rate": 80, "timestamp": 1000 + 60 * i} for i in range(90)]
+    assert client.post("/update/batch", json=samples).status_code == 200
+    jshttps.archive.close()
+    for store in (jshttps.latest_by_patient, jshttps.history_by_patient, jshttps.recent_risks_by_patient):
+        store.clear()
+    jshttps.archive = jshttps.VitalsArchive(jshttps.HISTORY_COLUMNS, root=jshttps.ARCHIVE_ROOT)
+    jshttps.restore_from_archive(hours=1)
+    assert len(jshttps.history_by_patient["7"]) == 61  # the hour up to the newest sample, inclusive
+    assert jshttps.latest_by_patient["7"]["timestamp"] == 1000 + 60 * 89
+
+@pytest.mark.parametrize("body", [
+    '{"patient_id": 1, "heart_rate": true}',
+    '{"patient_id": 1, "heart_rate": 80, "systolic_bp": false}',
+    '{"patient_id": 1, "body_temperature": 98.6}',
+    '{"patient_id": 1, "heart_rate": null}',
+])
+def test_boolean_or_missing_heart_rate_is_rejected(client, body):
+    assert post_json(client, "/update", body).status_code == 422
+    assert "1" not in jshttps.latest_by_patient
+
+def test_missing_optional_vitals_take_normal_defaults(client):
+    assert client.post("/update", json={"patient_id": 1, "heart_rate": 80}).status_code == 200
+    latest = client.get("/latest/1").json()
+    assert latest["risk_score"] == 0 and latest["risk_factors"] == []
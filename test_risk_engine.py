@@ -0,0 +1,61 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import risk_engine
+from risk_engine import (
+    ARCHIVE_COLUMNS, SAMPLE_FIELDS, TREND_WINDOW, calculate_advanced_risk_score, decode_risk_factors,
+    score_archive, score_risk_batch, score_sample,
+)
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "patient_history.csv")
+
+def test_backfill_matches_ingest_scoring_on_recorded_csv():
+    df = pd.read_csv(SAMPLE_CSV)
+    scored = score_archive(df)
+    payload_fields = {vital: field for vital, field, _ in SAMPLE_FIELDS}
+    recent = []
+    for row, (score, factors) in zip(df.to_dict("records"), zip(scored['RiskScore'], scored['RiskFactors'])):
+        payload = {payload_fields[vital]: row[column] for vital, column in ARCHIVE_COLUMNS.items() if column in row}
+        expected = score_sample(payload, recent[-5:])
+        recent.append(expected['risk_score'])
+        assert score == expected['risk_score']
+        assert factors == (', '.join(expected['risk_factors']) or 'None')
+
+# Readings that cross every band, so trend terms cascade through long runs
+HR_CHOICES = (40, 55, 75, 110, 140)
+TEMP_CHOICES = (94.0, 96.0, 98.6, 101.0, 104.0)
+SYSTOLIC_CHOICES = (75, 85, 120, 150, 190)
+DIASTOLIC_CHOICES = (45, 55, 80, 100, 125)
+SPO2_CHOICES = (85, 92, 98)
+
+def random_vitals(rng, n):
+    return (rng.choice(HR_CHOICES, n), rng.choice(TEMP_CHOICES, n), rng.choice(SYSTOLIC_CHOICES, n),
+            rng.choice(DIASTOLIC_CHOICES, n), rng.choice(SPO2_CHOICES, n))
+
+def scalar_scores(hr, temp, systolic, diastolic, spo2, prior_scores=()):
+    """Reference: the scalar path sample by sample, with the growing RiskScore history"""
+    history = list(prior_scores)
+    scores, factors = [], []
+    for values in zip(hr, temp, systolic, diastolic, spo2):
+        recent = history[-TREND_WINDOW:] if len(history) >= TREND_WINDOW else None
+        risk, risk_factors = calculate_advanced_risk_score(*values, recent_risks=recent)
+        history.append(risk)
+        scores.append(risk)
+        factors.append(risk_factors)
+    return scores, factors
+
+@pytest.mark.parametrize("cutoff", [0, risk_engine.SCALAR_CUTOFF, 10 ** 9])  # vectorized only, default, ordered loop only
+@pytest.mark.parametrize("prior_length", [0, 3, 8])
+@pytest.mark.parametrize("seed", range(5))
+def test_batch_scoring_matches_scalar_path(monkeypatch, cutoff, prior_length, seed):
+    monkeypatch.setattr(risk_engine, "SCALAR_CUTOFF", cutoff)
+    rng = np.random.default_rng(seed)
+    vitals = random_vitals(rng, 1000)
+    prior = rng.integers(0, 11, prior_length).tolist()
+    expected_scores, expected_factors = scalar_scores(*vitals, prior_scores=prior)
+    scores, masks = score_risk_batch(*vitals, prior_scores=prior)
+    assert scores.tolist() == expected_scores
+    assert [decode_risk_factors(int(mask)) for mask in masks] == expected_factors
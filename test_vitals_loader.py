@@ -0,0 +1,39 @@
+import io
+import json
+import os
+import random
+
+import pytest
+
+from vitals_loader import DEFAULT_PATIENT_ID, iter_json_array, iter_records
+
+SAMPLE_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "patient_history.csv")
+
+DOCUMENTS = [
+    "[1.5e10]",
+    '[1.5e10, 22, true, {"a": 1.25e3}]',
+    '[ -0.5 , null,false, "1.5e10", [1, 2.75e-3] ]\n',
+    "[]",
+]
+
+def random_document(rng):
+    values = [rng.choice([rng.uniform(-1e6, 1e6), rng.randint(-999, 999), True, None, "12:00:01",
+                          {"heart_rate": rng.uniform(40, 180), "timestamp": rng.uniform(1e9, 2e9)}])
+              for _ in range(rng.randint(0, 12))]
+    return json.dumps(values, separators=rng.choice([(",", ":"), (", ", ": "), (" ,  ", " : ")]))
+
+@pytest.mark.parametrize("doc", DOCUMENTS + [random_document(random.Random(seed)) for seed in range(20)])
+def test_every_chunk_size_decodes_like_json_loads(doc):
+    for chunk_size in range(1, len(doc) + 2):
+        assert list(iter_json_array(io.StringIO(doc), chunk_size)) == json.loads(doc), chunk_size
+
+@pytest.mark.parametrize("doc", ["[1.5e", "[1 2]", "[1,", '[{"a": 1}'])
+def test_malformed_array_raises(doc):
+    for chunk_size in range(1, len(doc) + 2):
+        with pytest.raises(ValueError):
+            list(iter_json_array(io.StringIO(doc), chunk_size))
+
+def test_csv_without_patient_id_replays_as_default_bed():
+    records = list(iter_records(SAMPLE_CSV))
+    assert records and all(r["patient_id"] == DEFAULT_PATIENT_ID for r in records)
+    assert "body_temperature" in records[0] and "systolic_bp" in records[0]
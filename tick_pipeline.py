@@ -0,0 +1,123 @@
+from collections import deque, namedtuple
+
+from alert_engine import AlertEngine
+from charts import TrendCharts, CHART_POINT_BUDGET
+from risk_engine import Alert, assess_vitals, assessment_from_record, get_risk_level, get_threshold_table, sample_vitals
+from rolling_stats import VitalsStats
+from vitals_history import VitalsHistory, VitalsRollups, DEFAULT_CAPACITY
+
+# --- DASHBOARD TICK PIPELINE (no Streamlit, so it can be benchmarked headless) ---
+ALERT_CONTEXT_CAPACITY = 10
+MULTI_SYSTEM_FACTORS = 3  # risk factors that raise the multi-system alert
+
+Sample = namedtuple("Sample", ["patient_id", "now", "time_str", "hr", "temp", "systolic", "diastolic", "spo2"])
+# new_alerts: AlertRecords opened or escalated by this sample (empty while conditions just persist)
+TickResult = namedtuple("TickResult", ["sample", "assessment", "risk_level", "stats", "new_alerts"])
+
+def parse_sample(data, now):
+    """Backend payload -> Sample, with the dashboard's defaults for missing vitals"""
+    hr, temp, systolic, diastolic, spo2 = sample_vitals(data)
+    return Sample(
+        patient_id=str(data.get('patient_id', 'default')),
+        now=now,
+        time_str=now.strftime("%H:%M:%S"),
+        hr=hr, temp=temp, systolic=systolic, diastolic=diastolic, spo2=spo2,
+    )
+
+class TickPipeline:
+    """Everything the dashboard does per sample, split into stages.
+
+    process() runs parse -> score -> append -> alerts; update_charts() is the
+    per-redraw figure refresh. Scoring reads the fields the backend added at
+    ingest and only falls back to the threshold table for unscored payloads.
+    Each stage is also callable on its own so bench_pipeline.py can time it.
+    """
+
+    def __init__(self, history_capacity=DEFAULT_CAPACITY):
+        self.history = VitalsHistory(history_capacity)
+        self.rollups = VitalsRollups()
+        self.stats_by_patient = {}
+        self.alerts = AlertEngine()
+        self.alert_context = deque(maxlen=ALERT_CONTEXT_CAPACITY)
+        self._charts = None
+
+    @property
+    def total_alerts(self):
+        """Notifications per severity (a persisting condition counts once)"""
+        return self.alerts.counts
+
+    @property
+    def charts(self):
+        """Figures are built on first use, so chart-less (shared, headless) pipelines never pay for them"""
+        if self._charts is None:
+            self._charts = TrendCharts()
+        return self._charts
+
+    def patient_stats(self, patient_id):
+        stats = self.stats_by_patient.get(patient_id)
+        if stats is None:
+            stats = self.stats_by_patient[patient_id] = VitalsStats()
+        return stats
+
+    def score(self, sample, data=None):
+        """The backend's assessment of the sample, or (unscored payloads) one pass over the threshold table"""
+        stats = self.patient_stats(sample.patient_id)
+        assessment = assessment_from_record(data) if data is not None else None
+        if assessment is not None:
+            return assessment, stats
+        assessment = assess_vitals(
+            sample.hr, sample.temp, sample.systolic, sample.diastolic, sample.spo2,
+            table=get_threshold_table(sample.patient_id),
+            recent_risks=stats['RiskScore'].values()
+        )
+        return assessment, stats
+
+    def append(self, sample, assessment, stats):
+        risk_factors = assessment.risk_factors
+        new_row = {
+            'Time': sample.time_str,
+            'Timestamp': sample.now,
+            'HR': sample.hr,
+            'Temp': sample.temp,
+            'Systolic': sample.systolic,
+            'Diastolic': sample.diastolic,
+            'SpO2': sample.spo2,
+            'RiskScore': assessment.risk,
+            'RiskFactors': ', '.join(risk_factors) if risk_factors else 'None'
+        }
+        self.history.append(new_row)  # O(1) write into preallocated columns
+        self.rollups.add(sample.now.timestamp(), new_row)
+        stats.update(new_row)
+        return new_row
+
+    def raise_alerts(self, sample, assessment):
+        """Feed this sample's alert candidates to the alert engine; returns the records that notify"""
+        candidates = list(assessment.alerts)
+        # Multi-system alert
+        risk_factors = assessment.risk_factors
+        if len(risk_factors) >= MULTI_SYSTEM_FACTORS:
+            candidates.append(Alert('critical', "Multi-system involvement detected", None,
+                                    f"Factors: {', '.join(risk_factors[:3])}", "Multi-system alert", 'multi', None))
+        notified = self.alerts.update(candidates, sample.now)
+        # Only new or escalated conditions reach the AI prompt's alert context
+        self.alert_context.extend(record.context for record in notified)
+        return notified
+
+    def process(self, data, now):
+        sample = parse_sample(data, now)
+        assessment, stats = self.score(sample, data)
+        self.append(sample, assessment, stats)
+        new_alerts = self.raise_alerts(sample, assessment)
+        return TickResult(sample, assessment, get_risk_level(assessment.risk), stats, new_alerts)
+
+    def update_charts(self, window, budget=CHART_POINT_BUDGET):
+        """Refresh the trend figures from the newest `window` rows"""
+        self.charts.update(self.history.tail(window), budget=budget)
+        return self.charts
+
+    def reset(self):
+        self.history.clear()
+        self.rollups.clear()
+        self.stats_by_patient.clear()
+        self.alerts.clear()
+        self.alert_context.clear()
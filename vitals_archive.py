@@ -0,0 +1,197 @@
+import bisect
+import os
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+# --- APPEND-ONLY VITALS ARCHIVE (backend side) ---
+# <root>/<patient dir>/<hour>.vitals holds raw fixed-width records for one bed
+# and one UTC hour (hour = int(timestamp // 3600)): one float64 per column.
+ARCHIVE_DIR = "vitals_archive"
+SEGMENT_SECONDS = 3600
+SEGMENT_SUFFIX = ".vitals"
+PATIENT_PREFIX = "p_"  # keeps ids like ".." from ever naming a real directory
+MAX_OPEN_SEGMENTS = 256  # append handles kept open (least recently written beds are closed)
+LAYOUT_FILE = "columns"  # record layout the segments under <root> were written with
+MIGRATED_SUFFIX = ".migrated"  # segment rewritten in the new layout, renamed into place once all are done
+
+class VitalsArchive:
+    """Per-patient, per-hour segment files of fixed-width float64 records.
+
+    The index (patient -> sorted segment hours) is rebuilt from the directory
+    listing at startup; besides the segments, only LAYOUT_FILE is kept on disk,
+    so a root is never read back with a different record width. A root written
+    with fewer columns (or before LAYOUT_FILE, with legacy_columns) is upgraded
+    in place at startup, the new columns reading as NaN.
+    Reads memory-map the segments that overlap the requested range and use a
+    binary search on the timestamp column; records are expected in arrival
+    order within a segment, like VitalsRingBuffer.
+    """
+
+    def __init__(self, columns, root=ARCHIVE_DIR, legacy_columns=None):
+        self.root = root
+        self.dtype = np.dtype([(name, "<f8") for name in columns])
+        self._segments = {}  # patient_id -> sorted list of segment hours
+        self._open = OrderedDict()  # patient_id -> (hour, file) currently appended to
+        os.makedirs(root, exist_ok=True)
+        self._load_index()
+        self._check_layout(tuple(columns), legacy_columns)
+
+    def _patient_dir(self, patient_id):
+        return os.path.join(self.root, PATIENT_PREFIX + quote(patient_id, safe=""))
+
+    def _segment_path(self, patient_id, hour):
+        return os.path.join(self._patient_dir(patient_id), f"{hour}{SEGMENT_SUFFIX}")
+
+    def _load_index(self):
+        for entry in os.scandir(self.root):
+            if not (entry.is_dir() and entry.name.startswith(PATIENT_PREFIX)):
+                continue
+            hours = sorted(
+                int(name[:-len(SEGMENT_SUFFIX)])
+                for name in os.listdir(entry.path)
+                if name.endswith(SEGMENT_SUFFIX)
+            )
+            if hours:
+                self._segments[unquote(entry.name[len(PATIENT_PREFIX):])] = hours
+
+    def _segment_files(self, suffix):
+        for entry in os.scandir(self.root):
+            if entry.is_dir() and entry.name.startswith(PATIENT_PREFIX):
+                for name in os.listdir(entry.path):
+                    if name.endswith(suffix):
+                        yield os.path.join(entry.path, name)
+
+    def _write_layout(self, columns):
+        path = os.path.join(self.root, LAYOUT_FILE)
+        with open(path + ".tmp", "w") as f:
+            f.write("\n".join(columns) + "\n")
+        os.replace(path + ".tmp", path)
+
+    def _check_layout(self, columns, legacy_columns):
+        """Bring the root to `columns`: a different width would misalign every existing record"""
+        path = os.path.join(self.root, LAYOUT_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                stored = tuple(f.read().split())
+        elif not self._segments:
+            stored = columns
+        elif legacy_columns is not None:
+            stored = tuple(legacy_columns)  # segments written before the layout file existed
+        else:
+            raise ValueError(f"Archive {self.root!r} predates its layout file and no legacy layout was given")
+        if stored == columns:
+            # A migration that stopped after switching the layout only has renames left
+            for migrated in self._segment_files(MIGRATED_SUFFIX):
+                os.replace(migrated, migrated[:-len(MIGRATED_SUFFIX)])
+            self._write_layout(columns)
+            return
+        dropped = [name for name in stored if name not in columns]
+        if dropped:
+            raise ValueError(f"Archive {self.root!r} has columns {dropped} that {columns} would drop")
+        self._migrate(np.dtype([(name, "<f8") for name in stored]), columns)
+
+    def _migrate(self, old_dtype, columns):
+        """Rewrite every segment from old_dtype to self.dtype, crash-safe via MIGRATED_SUFFIX copies"""
+        for stale in self._segment_files(MIGRATED_SUFFIX):
+            os.remove(stale)  # left by an interrupted migration, before the layout switched
+        for path in list(self._segment_files(SEGMENT_SUFFIX)):
+            n = os.path.getsize(path) // old_dtype.itemsize
+            old = np.fromfile(path, dtype=old_dtype, count=n)
+            new = np.full(n, np.nan, dtype=self.dtype)
+            for name in old_dtype.names:
+                new[name] = old[name]
+            new.tofile(path + MIGRATED_SUFFIX)
+        self._write_layout(columns)
+        for migrated in self._segment_files(MIGRATED_SUFFIX):
+            os.replace(migrated, migrated[:-len(MIGRATED_SUFFIX)])
+
+    def patients(self):
+        return list(self._segments)
+
+    def __contains__(self, patient_id):
+        return patient_id in self._segments
+
+    def append(self, patient_id, rows):
+        """Append an (n, n_columns) block of rows (first column = epoch seconds)"""
+        rows = np.ascontiguousarray(rows, dtype="<f8")
+        if len(rows) == 0:
+            return
+        if not np.isfinite(rows[:, 0]).all():
+            # NaN/inf would cast to hour -2**63 and leave a bogus segment that every restart reloads
+            raise ValueError("Archive rows need finite timestamps")
+        hours = (rows[:, 0] // SEGMENT_SECONDS).astype(np.int64)
+        # Split where the hour changes, so a batch spanning an hour boundary lands in both files
+        cuts = np.flatnonzero(np.diff(hours)) + 1
+        for start, end in zip(np.r_[0, cuts], np.r_[cuts, len(rows)]):
+            handle = self._segment_file(patient_id, int(hours[start]))
+            handle.write(rows[start:end].tobytes())
+        handle.flush()
+
+    def _segment_file(self, patient_id, hour):
+        current = self._open.get(patient_id)
+        if current is not None and current[0] == hour:
+            self._open.move_to_end(patient_id)
+            return current[1]
+        if current is not None:
+            current[1].close()
+        os.makedirs(self._patient_dir(patient_id), exist_ok=True)
+        handle = open(self._segment_path(patient_id, hour), "ab")
+        # Drop a torn record left by a crash so new records stay aligned
+        size = handle.seek(0, os.SEEK_END)
+        if size % self.dtype.itemsize:
+            handle.truncate(size - size % self.dtype.itemsize)
+        self._open[patient_id] = (hour, handle)
+        self._open.move_to_end(patient_id)
+        if len(self._open) > MAX_OPEN_SEGMENTS:
+            self._open.popitem(last=False)[1][1].close()
+        hours = self._segments.setdefault(patient_id, [])
+        idx = bisect.bisect_left(hours, hour)
+        if idx == len(hours) or hours[idx] != hour:
+            hours.insert(idx, hour)
+        return handle
+
+    def _read_segment(self, patient_id, hour):
+        path = self._segment_path(patient_id, hour)
+        # Whole records only: a torn write after a crash leaves a partial tail
+        n = os.path.getsize(path) // self.dtype.itemsize
+        if n == 0:
+            return np.empty(0, dtype=self.dtype)
+        return np.memmap(path, dtype=self.dtype, mode="r", shape=(n,))
+
+    def last_timestamp(self, patient_id):
+        """Timestamp of the bed's newest archived record, or None"""
+        rows = self.range(patient_id, limit=1)
+        return float(rows[0, 0]) if rows.shape[1] else None
+
+    def range(self, patient_id, since=None, until=None, limit=None):
+        """Rows with since <= timestamp <= until as one (n_columns, n) array, oldest first"""
+        hours = self._segments.get(patient_id, [])
+        lo = 0 if since is None else bisect.bisect_left(hours, int(since // SEGMENT_SECONDS))
+        hi = len(hours) if until is None else bisect.bisect_right(hours, int(until // SEGMENT_SECONDS))
+        # Walk newest segment first so a small limit touches only the last files
+        parts = []
+        remaining = limit
+        for hour in reversed(hours[lo:hi]):
+            records = self._read_segment(patient_id, hour)
+            ts = records[self.dtype.names[0]]
+            start = 0 if since is None else np.searchsorted(ts, since, side="left")
+            end = len(records) if until is None else np.searchsorted(ts, until, side="right")
+            if remaining is not None:
+                start = max(start, end - remaining)
+            if end > start:
+                parts.append(records[start:end])
+                if remaining is not None:
+                    remaining -= end - start
+            if remaining is not None and remaining <= 0:
+                break
+        if not parts:
+            return np.empty((len(self.dtype.names), 0))
+        records = np.concatenate(parts[::-1])
+        return records.view("<f8").reshape(len(records), -1).T.copy()
+
+    def close(self):
+        for _, handle in self._open.values():
+            handle.close()
+        self._open.clear()
@@ -0,0 +1,197 @@
+import numpy as np
+import pandas as pd
+
+# --- COLUMNAR VITALS HISTORY (dashboard side) ---
+HISTORY_COLUMNS = ['Time', 'Timestamp', 'HR', 'Temp', 'Systolic', 'Diastolic', 'SpO2', 'RiskScore', 'RiskFactors']
+NUMERIC_COLUMNS = ['HR', 'Temp', 'Systolic', 'Diastolic', 'SpO2', 'RiskScore']
+DEFAULT_CAPACITY = 3600  # 1 h of 1 Hz samples
+
+def _allocate(name, size):
+    if name in NUMERIC_COLUMNS:
+        return np.full(size, np.nan)
+    if name == 'Timestamp':
+        return np.full(size, np.datetime64('NaT'), dtype='datetime64[us]')
+    return np.empty(size, dtype=object)
+
+class _RowIndexer:
+    def __init__(self, view):
+        self._view = view
+
+    def __getitem__(self, position):
+        return self._view.row(position)
+
+class HistoryView:
+    """Read-only window over the history columns with the pandas-style accessors the dashboard uses.
+
+    Column access returns Series backed by slices of the preallocated arrays
+    (no copy). A view is only valid until the next append to its history.
+    """
+
+    def __init__(self, arrays, start, end):
+        self._arrays = arrays
+        self._start = start
+        self._end = end
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def columns(self):
+        return list(HISTORY_COLUMNS)
+
+    def values(self, name):
+        """Zero-copy ndarray slice of one column, oldest first"""
+        return self._arrays[name][self._start:self._end]
+
+    def __getitem__(self, name):
+        return pd.Series(self.values(name), name=name, copy=False)
+
+    @property
+    def iloc(self):
+        return _RowIndexer(self)
+
+    def row(self, position):
+        """One sample as a Series; negative positions count from the newest"""
+        size = len(self)
+        if position < 0:
+            position += size
+        if not 0 <= position < size:
+            raise IndexError("history row out of range")
+        idx = self._start + position
+        return pd.Series({name: self._arrays[name][idx] for name in HISTORY_COLUMNS})
+
+    def tail(self, n=5):
+        return HistoryView(self._arrays, max(self._end - n, self._start), self._end)
+
+    def to_dataframe(self):
+        return pd.DataFrame({name: self.values(name) for name in HISTORY_COLUMNS})
+
+class VitalsHistory(HistoryView):
+    """Fixed-capacity history with O(1) amortized append.
+
+    Columns are preallocated at twice the capacity and written linearly, so the
+    live window is always one contiguous slice. When the end of the arrays is
+    reached, the newest rows are moved back to the front in one block copy.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        super().__init__({name: _allocate(name, 2 * capacity) for name in HISTORY_COLUMNS}, 0, 0)
+
+    def append(self, row):
+        """Add one sample given as a dict keyed by HISTORY_COLUMNS"""
+        buffer_size = 2 * self.capacity
+        if self._end == buffer_size:
+            keep = self.capacity - 1
+            for array in self._arrays.values():
+                array[:keep] = array[self._end - keep:self._end]
+            self._start, self._end = 0, keep
+        idx = self._end
+        for name in HISTORY_COLUMNS:
+            self._arrays[name][idx] = row[name]
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+
+    def clear(self):
+        self._start = self._end = 0
+
+# --- ROLLUP TIERS (wall-clock windows at constant memory) ---
+ROLLUP_TIERS = ((1, 3600), (60, 1440), (900, 672))  # (bucket seconds, buckets kept): 1 h, 24 h, 7 days
+
+class RollupTier:
+    """Ring of fixed-width time buckets holding count/sum/min/max/last per numeric column"""
+
+    def __init__(self, width, slots):
+        self.width = width
+        self.slots = slots
+        n = len(NUMERIC_COLUMNS)
+        self.ids = np.full(slots, -1, dtype=np.int64)
+        self.count = np.zeros((slots, n))
+        self.sum = np.zeros((slots, n))
+        self.min = np.full((slots, n), np.inf)
+        self.max = np.full((slots, n), -np.inf)
+        self.last = np.full((slots, n), np.nan)
+
+    @property
+    def span(self):
+        return self.width * self.slots
+
+    def add(self, ts, values):
+        bucket = int(ts // self.width)
+        slot = bucket % self.slots
+        if self.ids[slot] != bucket:
+            # Slot still holds a bucket that has aged out of the ring: reuse it
+            self.ids[slot] = bucket
+            self.count[slot] = 0
+            self.sum[slot] = 0
+            self.min[slot] = np.inf
+            self.max[slot] = -np.inf
+            self.last[slot] = np.nan
+        seen = ~np.isnan(values)
+        self.count[slot] += seen
+        self.sum[slot] += np.where(seen, values, 0)
+        np.fmin(self.min[slot], values, out=self.min[slot])
+        np.fmax(self.max[slot], values, out=self.max[slot])
+        self.last[slot] = np.where(seen, values, self.last[slot])
+
+    def buckets(self, start_ts, end_ts):
+        """Slots whose bucket starts in [start_ts, end_ts], oldest first"""
+        first, last = int(start_ts // self.width), int(end_ts // self.width)
+        slots = np.flatnonzero((self.ids >= first) & (self.ids <= last))
+        return slots[np.argsort(self.ids[slots])]
+
+    def clear(self):
+        self.ids[:] = -1
+
+class VitalsRollups:
+    """1 s / 1 min / 15 min rollups updated per sample; window reads touch a bounded number of buckets"""
+
+    def __init__(self, tiers=ROLLUP_TIERS):
+        self.tiers = [RollupTier(width, slots) for width, slots in tiers]
+
+    def add(self, ts, row):
+        """Fold one sample (dict keyed by NUMERIC_COLUMNS) into every tier"""
+        values = np.array([row[name] for name in NUMERIC_COLUMNS], dtype=float)
+        for tier in self.tiers:
+            tier.add(ts, values)
+
+    def tier_for(self, seconds):
+        """Finest tier that still covers the window"""
+        for tier in self.tiers:
+            if seconds <= tier.span:
+                return tier
+        return self.tiers[-1]
+
+    def window_stats(self, seconds, now):
+        """count/mean/min/max/last per column over the last `seconds` of wall-clock time.
+
+        Edges are aligned to the chosen tier's bucket width (exact on the 1 s tier).
+        """
+        tier = self.tier_for(seconds)
+        slots = tier.buckets(now - seconds + tier.width, now)
+        count = tier.count[slots].sum(axis=0)
+        total = tier.sum[slots].sum(axis=0)
+        lows = tier.min[slots].min(axis=0, initial=np.inf)
+        highs = tier.max[slots].max(axis=0, initial=-np.inf)
+        stats = {}
+        for i, name in enumerate(NUMERIC_COLUMNS):
+            seen = tier.last[slots, i]
+            seen = seen[~np.isnan(seen)]
+            n = int(count[i])
+            stats[name] = {
+                'count': n,
+                'mean': total[i] / n if n else np.nan,
+                'min': lows[i] if n else np.nan,
+                'max': highs[i] if n else np.nan,
+                'last': seen[-1] if len(seen) else np.nan,
+            }
+        return stats
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
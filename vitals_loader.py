@@ -0,0 +1,136 @@
+import csv
+import json
+import os
+from datetime import datetime, time as dt_time
+
+# --- STREAMING RECORD LOADER (replay feeders) ---
+# Records are yielded one at a time, so memory stays flat however large the
+# recording is and the first sample is available as soon as it is parsed.
+CHUNK_SIZE = 1 << 16  # characters read per refill of the JSON array parser
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+# CSV exports (e.g. patient_history.csv) use short column names
+FIELD_ALIASES = {"temp": "body_temperature", "sys_bp": "systolic_bp", "dia_bp": "diastolic_bp"}
+# Single-bed recordings (patient_history.csv has no patient_id column) replay as this bed
+DEFAULT_PATIENT_ID = "1"
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    """Yield the elements of a top-level JSON array without loading the whole file"""
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def refill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            refill()
+            continue
+        char = buffer[pos]
+        if not started:
+            if char != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            pos += 1
+            continue
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            refill()
+            continue
+        # An element is complete only once the next delimiter is in the buffer: a
+        # number cut by the chunk boundary ("1." of "1.5e10") decodes as a shorter one
+        after = end
+        while after < len(buffer) and buffer[after] in _WHITESPACE:
+            after += 1
+        if after == len(buffer) or buffer[after] not in ",]":
+            if not eof:
+                refill()
+                continue
+            raise ValueError(f"Expected ',' or ']' after array element at offset {end}")
+        pos = end
+        yield item
+
+def iter_ndjson(f):
+    """One JSON object per line; blank lines are skipped"""
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+def iter_csv(f):
+    for row in csv.DictReader(f):
+        yield {FIELD_ALIASES.get(name, name): value for name, value in row.items()}
+
+def iter_records(path, chunk_size=CHUNK_SIZE):
+    """Stream records from a .json array, .ndjson/.jsonl or .csv file (patient_id defaults to DEFAULT_PATIENT_ID)"""
+    suffix = os.path.splitext(path)[1].lower()
+    with open(path, "r", newline="" if suffix == ".csv" else None) as f:
+        if suffix == ".csv":
+            records = iter_csv(f)
+        elif suffix in NDJSON_SUFFIXES:
+            records = iter_ndjson(f)
+        else:
+            records = iter_json_array(f, chunk_size)
+        for record in records:
+            if isinstance(record, dict) and record.get("patient_id") in (None, ""):
+                record["patient_id"] = DEFAULT_PATIENT_ID
+            yield record
+
+def select_patients(records, patient_ids=None):
+    """Only the records for the given beds (None = every bed); ids compare as strings, so 1 and "1" match"""
+    if patient_ids is None:
+        yield from records
+        return
+    wanted = {str(pid) for pid in patient_ids}
+    for record in records:
+        if str(record.get("patient_id")) in wanted:
+            yield record
+
+def record_time(value):
+    """Epoch seconds for a record timestamp: epoch number, ISO-8601 datetime or bare HH:MM:SS"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    text = str(value).replace("Z", "+00:00")
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        pass
+    try:
+        clock = dt_time.fromisoformat(text)
+    except ValueError:
+        return None
+    # Time of day only (e.g. patient_history.csv): seconds since midnight is enough for pacing
+    return clock.hour * 3600 + clock.minute * 60 + clock.second + clock.microsecond / 1e6
+
+def in_time_order(records, presorted=False, key="timestamp"):
+    """Yield records sorted by timestamp.
+
+    Pre-sorted input is passed straight through (constant memory, first record
+    immediately); anything else has to be collected and sorted first.
+    """
+    if presorted:
+        yield from records
+    else:
+        yield from sorted(records, key=lambda r: r[key])
@@ -0,0 +1,154 @@
+import html
+from collections import deque
+
+from risk_engine import assess_vitals, assessment_from_record, get_risk_level, get_threshold_table, STATUS_COLORS
+from tick_pipeline import parse_sample
+
+# --- WARD OVERVIEW (many beds from one session, no Streamlit) ---
+# One /latest?all=true response per tick feeds a compact state per bed: the
+# newest sample, its assessment and a short sparkline ring. The grid is drawn
+# as a single HTML block of inline SVG instead of one Plotly figure per bed.
+SPARKLINE_POINTS = 120  # readings kept per bed for its sparklines
+STALE_SECONDS = 30  # a bed with no new sample for this long is flagged "No signal"
+STALE_COLOR = "#666666"
+SPARK_WIDTH = 160
+SPARK_HEIGHT = 32
+WARD_COLUMNS = 4
+
+class BedState:
+    """Latest sample, assessment and sparkline history for one bed"""
+    __slots__ = ("patient_id", "latest", "sample", "assessment", "hr", "spo2", "risk", "updated_at", "tile")
+
+    def __init__(self, patient_id):
+        self.patient_id = patient_id
+        self.latest = None
+        self.sample = None
+        self.assessment = None
+        self.hr = deque(maxlen=SPARKLINE_POINTS)
+        self.spo2 = deque(maxlen=SPARKLINE_POINTS)
+        self.risk = deque(maxlen=SPARKLINE_POINTS)
+        self.updated_at = None
+        self.tile = (None, None)  # (updated_at, stale) -> cached tile HTML
+
+    def update(self, data, now, dedupe=True):
+        """Score and record a sample; False if it is the one already seen.
+
+        dedupe is for polled /latest snapshots, which repeat a sample until the
+        next one; every streamed event is a new reading, even with equal vitals.
+        """
+        if dedupe and data == self.latest:
+            return False
+        sample = parse_sample(data, now)
+        # Scored once by the backend at ingest; beds fed by an older backend are scored here
+        assessment = assessment_from_record(data) or assess_vitals(
+            sample.hr, sample.temp, sample.systolic, sample.diastolic, sample.spo2,
+            table=get_threshold_table(self.patient_id),
+            recent_risks=self.risk
+        )
+        self.latest = data
+        self.sample = sample
+        self.assessment = assessment
+        self.hr.append(sample.hr)
+        self.spo2.append(sample.spo2)
+        self.risk.append(assessment.risk)
+        self.updated_at = now
+        return True
+
+    def is_stale(self, now, stale_seconds=STALE_SECONDS):
+        return self.updated_at is None or (now - self.updated_at).total_seconds() > stale_seconds
+
+class WardState:
+    """Per-bed state for every patient the backend knows about"""
+
+    def __init__(self):
+        self.beds = {}
+
+    def __len__(self):
+        return len(self.beds)
+
+    def update(self, latest_by_patient, now, dedupe=True):
+        """Apply a /latest?all=true response (or streamed samples, dedupe=False); returns the number of beds with a new sample"""
+        changed = 0
+        for patient_id, data in latest_by_patient.items():
+            patient_id = str(patient_id)
+            bed = self.beds.get(patient_id)
+            if bed is None:
+                bed = self.beds[patient_id] = BedState(patient_id)
+            changed += bed.update(data, now, dedupe)
+        return changed
+
+    def patient_ids(self):
+        return sorted(self.beds, key=lambda pid: (len(pid), pid))  # "2" before "10"
+
+    def ranked(self, now):
+        """Beds sickest first; silent beds after live ones"""
+        return sorted(
+            (bed for bed in self.beds.values() if bed.assessment is not None),
+            key=lambda bed: (bed.is_stale(now), -bed.assessment.risk, bed.patient_id)
+        )
+
+    def counts(self, now):
+        """Beds per risk level, plus 'No signal'"""
+        counts = {}
+        for bed in self.beds.values():
+            if bed.assessment is None:
+                continue
+            level = "No signal" if bed.is_stale(now) else get_risk_level(bed.assessment.risk)[0]
+            counts[level] = counts.get(level, 0) + 1
+        return counts
+
+    def clear(self):
+        self.beds.clear()
+
+def sparkline_svg(values, color, low=None, high=None, width=SPARK_WIDTH, height=SPARK_HEIGHT):
+    """Inline SVG polyline of a short series (fixed low/high keep beds comparable)"""
+    if len(values) < 2:
+        return f'<svg width="{width}" height="{height}"></svg>'
+    lo = min(values) if low is None else low
+    hi = max(values) if high is None else high
+    span = (hi - lo) or 1
+    step = width / (len(values) - 1)
+    points = " ".join(
+        f"{i * step:.1f},{height - 1 - (min(max(v, lo), hi) - lo) / span * (height - 2):.1f}"
+        for i, v in enumerate(values)
+    )
+    return (f'<svg width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+            f'<polyline fill="none" stroke="{color}" stroke-width="1.5" points="{points}"/></svg>')
+
+def bed_tile_html(bed, now):
+    """Tile for one bed, rebuilt only when it has a new sample or goes silent"""
+    stale = bed.is_stale(now)
+    key = (bed.updated_at, stale)
+    if bed.tile[0] == key:
+        return bed.tile[1]
+    sample, assessment = bed.sample, bed.assessment
+    if stale:
+        level, color, icon = "No signal", STALE_COLOR, "⏸"
+    else:
+        level, color, icon = get_risk_level(assessment.risk)
+    hr_color = STATUS_COLORS[assessment.status['hr'][0]]
+    spo2_color = STATUS_COLORS[assessment.status['spo2'][0]]
+    factors = html.escape(", ".join(assessment.risk_factors[:2])) or "No risk factors"
+    tile = f"""
+    <div class="ward-tile" style="border-left: 4px solid {color};">
+        <div class="ward-tile-head">
+            <strong>Bed {html.escape(bed.patient_id)}</strong>
+            <span class="status-badge" style="background-color: {color};">{icon} {level} {assessment.risk}/10</span>
+        </div>
+        <div class="ward-vitals">
+            <span style="color: {hr_color};">💓 {sample.hr}</span>
+            <span style="color: {spo2_color};">🫁 {sample.spo2}%</span>
+            <span>🩸 {sample.systolic}/{sample.diastolic}</span>
+            <span>🌡️ {sample.temp}</span>
+        </div>
+        {sparkline_svg(bed.hr, hr_color)}
+        {sparkline_svg(bed.risk, color, low=0, high=10)}
+        <div class="ward-factors">{factors} · {sample.time_str}</div>
+    </div>"""
+    bed.tile = (key, tile)
+    return tile
+
+def ward_grid_html(ward, now, columns=WARD_COLUMNS):
+    """The whole ward as one HTML block (one st.markdown call per tick)"""
+    tiles = "".join(bed_tile_html(bed, now) for bed in ward.ranked(now))
+    return f'<div class="ward-grid" style="grid-template-columns: repeat({columns}, 1fr);">{tiles}</div>'